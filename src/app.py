@@ -1,6 +1,143 @@
-from src.ports_core import PortsCore, PortException
-from tkinter import scrolledtext, ttk
+from src.ports_core import PortsCore, PortException, ReceiveBuffer, Portion, FileSendJob
+from src.hexview import HexCapture, parse_pattern
+from tkinter import scrolledtext, filedialog, ttk, font as tkfont
+from collections import deque
 import tkinter as tk
+import threading
+import logging
+import time
+
+class ScrollbackView:
+    """Text widget wrapper: coalesces appends into one insert per flush and caps scrollback.
+
+    Old lines are trimmed in bulk once the widget exceeds max_lines by trim_slack lines,
+    so the cost of delete() is paid rarely, not on every insert. max_chars caps the
+    content too, since a single line (one RX portion) can be arbitrarily long.
+    """
+    def __init__(self, widget: tk.Text, max_lines: int, trim_slack: int | None = None, max_chars: int = 1 << 20):
+        self.widget = widget
+        self.max_lines: int = max_lines
+        self.trim_slack: int = trim_slack if trim_slack is not None else max(1, max_lines // 10)
+        self.max_chars: int = max_chars
+        self.__chars: int = 0  # Characters in the widget (kept in sync on every trim)
+        self.__pending: list[str] = []
+
+    def append(self, text: str) -> None:
+        self.__pending.append(text)
+
+    def clear(self) -> None:
+        self.__pending.clear()
+        self.widget.delete("1.0", tk.END)
+        self.__chars = 0
+
+    def char_count(self) -> int:
+        count = self.widget.count("1.0", "end-1c", "chars")
+        return count[0] if isinstance(count, tuple) else (count or 0)
+
+    def flush(self) -> None:
+        if not self.__pending:
+            return
+        text = "".join(self.__pending)
+        self.__pending.clear()
+        if len(text) > self.max_chars:
+            text = text[-self.max_chars:]  # Older part would be trimmed right away
+        self.widget.insert(tk.END, text)
+        self.__chars += len(text)
+        line_count = int(self.widget.index("end-1c").split(".")[0])
+        if line_count > self.max_lines + self.trim_slack:
+            self.widget.delete("1.0", f"{line_count - self.max_lines + 1}.0")
+            self.__chars = self.char_count()
+        if self.__chars > self.max_chars + self.max_chars // 10:
+            self.widget.delete("1.0", f"1.0 + {self.__chars - self.max_chars} chars")
+            self.__chars = self.max_chars
+        self.widget.see(tk.END)
+
+class HexView:
+    """Hex + ASCII view of a HexCapture that only ever holds the visible rows.
+
+    The scrollbar is driven by the capture's row count, not by the widget's content, so the
+    cost of a redraw depends on the window height, not on the capture size. While following
+    the tail (the default) new data redraws at most once per flush().
+    """
+    def __init__(self, widget: tk.Text, scrollbar: tk.Scrollbar, capture: HexCapture):
+        self.widget = widget
+        self.scrollbar = scrollbar
+        self.capture = capture
+        self.follow: bool = True  # Keep the last rows in view as data arrives
+        self.top_offset: int = 0  # Stream offset of the first visible row when not following
+        self.mark: tuple[int, int] | None = None  # (offset, length) to highlight, e.g. a search match
+        self.__dirty: bool = True
+        self.__line_height: int = tkfont.Font(font=widget.cget("font")).metrics("linespace")
+        self.widget.tag_configure("mark", background="yellow")
+        self.scrollbar.config(command=self.on_scroll)
+        self.widget.bind("<MouseWheel>", lambda event: self.scroll_rows(-3 if event.delta > 0 else 3))
+        self.widget.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+        self.widget.bind("<Button-5>", lambda event: self.scroll_rows(3))
+        self.widget.bind("<Configure>", lambda event: self.invalidate())
+
+    def visible_rows(self) -> int:
+        height = self.widget.winfo_height()
+        return max(1, height // self.__line_height) if height > 1 else int(self.widget.cget("height"))
+
+    def top_row(self) -> int:
+        if self.follow:
+            return max(0, self.capture.row_count - self.visible_rows())
+        return self.capture.row_of(self.top_offset)
+
+    def invalidate(self) -> None:
+        self.__dirty = True
+
+    def on_scroll(self, action, amount, unit=None) -> None:
+        if action == "moveto":
+            self.set_top_row(int(float(amount) * self.capture.row_count))
+        else:
+            self.scroll_rows(int(amount) * (self.visible_rows() if unit == "pages" else 1))
+
+    def scroll_rows(self, rows: int) -> str:
+        self.set_top_row(self.top_row() + rows)
+        return "break"
+
+    def set_top_row(self, row: int) -> None:
+        last_top = max(0, self.capture.row_count - self.visible_rows())
+        row = max(0, min(row, last_top))
+        self.follow = row >= last_top  # Scrolling to the bottom resumes following
+        self.top_offset = self.capture.base_offset + row * self.capture.width
+        self.render()
+
+    def goto(self, offset: int, length: int = 1) -> None:
+        self.mark = (offset, length)
+        self.set_top_row(self.capture.row_of(offset) - self.visible_rows() // 2)
+
+    def flush(self) -> None:
+        if self.__dirty and self.widget.winfo_ismapped():
+            self.render()
+
+    def render(self) -> None:
+        self.__dirty = False
+        rows = self.visible_rows()
+        top = self.top_row()
+        self.widget.config(state="normal")
+        self.widget.delete("1.0", tk.END)
+        self.widget.insert("1.0", self.capture.rows(top, rows))
+        if self.mark:
+            self.highlight(top, *self.mark)
+        self.widget.config(state="disabled")
+        total = max(1, self.capture.row_count)
+        self.scrollbar.set(top / total, min(1.0, (top + rows) / total))
+
+    def highlight(self, top: int, offset: int, length: int) -> None:
+        width = self.capture.width
+        ascii_column = 10 + width * 3 + 1  # See format_rows(): offset, 2 spaces, hex, 2 spaces, ASCII
+        position = offset - self.capture.base_offset - top * width
+        end = min(position + length, self.visible_rows() * width)
+        position = max(0, position)
+        while position < end:
+            line = position // width + 1
+            first = position % width
+            last = min(width, first + end - position)
+            self.widget.tag_add("mark", f"{line}.{10 + first * 3}", f"{line}.{10 + last * 3 - 1}")
+            self.widget.tag_add("mark", f"{line}.{ascii_column + first}", f"{line}.{ascii_column + last}")
+            position += last - first
 
 class App:
     def __init__(self):
@@ -14,15 +151,40 @@ class App:
 
         self.tx_port = None  # For status
         self.rx_port = None
-        self.portion_bytes = 0  # For RX portion (reset on pause)
         self.receiving_text_widget = None
         self.receiving_device = None
         self.ports_open = False
+        self.ports_busy = False  # Open/close running in the background
+        self.rx_buffer = ReceiveBuffer(max_bytes=1 << 20, drop_policy=ReceiveBuffer.DROP_OLDEST)  # Finished portions, RX thread -> UI
+        self.reported_dropped_bytes = 0
+        self.send_jobs = []  # SendJob objects not yet reported as finished
+        self.file_job: FileSendJob | None = None  # File transfer controlled by Pause/Cancel
+
+        # Scrollback and debug log settings
+        self.output_max_lines = 5000
+        self.output_max_chars = 1 << 20  # Also caps memory when portions are long
+        self.hex_capture = HexCapture(max_bytes=64 << 20, width=8)  # Raw RX bytes for the hex view, nothing decoded away
+        self.rx_stream_bytes = 0  # Bytes received this session, numbers portions before rx_buffer may drop them (RX thread)
+        self.debug_max_lines = 1000
+        self.debug_level = logging.INFO  # Messages below this level are not shown
+        self.rx_log_interval = 1.0  # Seconds between aggregated RX lines in the debug log
+        self.rx_log_bytes = 0
+        self.rx_log_chunks = 0
+        self.rx_log_portions = 0
+        self.rx_log_at = time.monotonic()
+
+        # Port list and TX->RX pairing
+        self.available_ports: list[str] = []
+        self.tx_to_rx: dict[str, str] = {"COM7": "COM10", "COM8": "COM9"}  # Defaults for krest, replaced by Auto-pair
+        self.port_events = deque()  # Results of background work (hotplug, auto-pair, open/close), applied on the UI tick
+        self.__ports_core.emit_ports_changed = lambda added, removed: self.port_events.append(("ports", added, removed))
+        self.__ports_core.emit_receive_error = lambda name, error: self.port_events.append(("rx_error", name, error))
+        self.__ports_core.start_port_watch()
 
         # Auto-start integrated GUI (no menu)
         self.render_integrated_gui()
         # Auto-start RX for demo (modify for device)
-        self.__ports_core.emit_received = self.emit_received_wrapper
+        self.__ports_core.emit_portion = self.emit_portion_wrapper
         self.__root.after(100, self.check_portion_end)
 
     def render_integrated_gui(self):
@@ -32,8 +194,8 @@ class App:
         # Top: Port selection (restored Combobox original logic)
         control_frame = tk.LabelFrame(main_container, text="Port Selection & Control", font=('Arial', 12, 'bold'))
         control_frame.pack(fill='x', pady=5)
-        # Available ports (original)
-        available_ports = self.__ports_core.get_available_ports()
+        # Available ports: cached by the background watcher, combos are filled on port events
+        available_ports = self.available_ports
         # TX Combobox (original style, not spin)
         tx_frame = tk.Frame(control_frame)
         tx_frame.pack(side='left', padx=10)
@@ -48,29 +210,22 @@ class App:
         self.rx_var = tk.StringVar(value="Select TX for auto RX")
         self.rx_combo = ttk.Combobox(rx_frame, textvariable=self.rx_var, values=available_ports, state="readonly", width=15)  # Read-only
         self.rx_combo.pack(side='left')
-        # ### NEW: Hardcode mapping TX to RX (7→10, 8→9)
-        tx_to_rx = {'7': '10', '8': '9'}  # Dict for krest
         def on_tx_change(*args):
             tx_selected = self.tx_var.get()
-            if tx_selected and tx_selected.startswith('COM'):
-                try:
-                    tx_num = tx_selected.replace('COM', '')
-                    if tx_num in tx_to_rx:
-                        rx_num = tx_to_rx[tx_num]
-                        rx_selected = f"COM{rx_num}"
-                        if rx_selected in available_ports:
-                            self.rx_var.set(rx_selected)
-                            self.control_error.config(text=f"Auto RX set to {rx_selected}", fg="green")
-                        else:
-                            self.rx_var.set("RX not available")
-                            self.control_error.config(text=f"Warning: RX {rx_selected} not in VSPE", fg="orange")
-                    else:
-                        self.rx_var.set("No auto for this TX")
-                        self.control_error.config(text="Only COM7/COM8 auto-pair", fg="orange")
-                except ValueError:
-                    self.control_error.config(text="Invalid TX", fg="red")
-            else:
+            if not tx_selected:
                 self.rx_var.set("Select TX first")
+                return
+            rx_selected = self.tx_to_rx.get(tx_selected)
+            if rx_selected is None:
+                self.rx_var.set("No auto for this TX")
+                self.control_error.config(text="No pair for this TX - try Auto-pair", fg="orange")
+            elif rx_selected in self.available_ports:
+                self.rx_var.set(rx_selected)
+                self.control_error.config(text=f"Auto RX set to {rx_selected}", fg="green")
+            else:
+                self.rx_var.set("RX not available")
+                self.control_error.config(text=f"Warning: RX {rx_selected} not in VSPE", fg="orange")
+        self.on_tx_change = on_tx_change
         self.tx_var.trace('w', on_tx_change)
         # Baud (custom input: state="normal" for edit)
         baud_frame = tk.Frame(control_frame)
@@ -79,6 +234,8 @@ class App:
         self.baud_var = tk.StringVar(value=str(self.__ports_core.baudrate))
         self.baud_combo = ttk.Combobox(baud_frame, textvariable=self.baud_var, values=["9600", "19200", "38400", "57600", "115200"], state="normal", width=10)  # ### FIX4: state="normal" for custom input
         self.baud_combo.pack(side='left')
+        self.baud_combo.bind("<<ComboboxSelected>>", self.apply_port_params)
+        self.baud_combo.bind("<Return>", self.apply_port_params)
         # Timeout
         timeout_frame = tk.Frame(control_frame)
         timeout_frame.pack(side='left', padx=10)
@@ -86,9 +243,20 @@ class App:
         self.timeout_var = tk.StringVar(value=str(self.__ports_core.timeout))
         self.timeout_combo = ttk.Combobox(timeout_frame, textvariable=self.timeout_var, values=["0.1", "0.2", "0.3", "0.4", "0.5", "1.0"], state="normal", width=10)  # Allow custom
         self.timeout_combo.pack(side='left')
+        self.timeout_combo.bind("<<ComboboxSelected>>", self.apply_port_params)
+        self.timeout_combo.bind("<Return>", self.apply_port_params)
+        # Compression (opt-in, both ends must match)
+        compression_frame = tk.Frame(control_frame)
+        compression_frame.pack(side='left', padx=10)
+        tk.Label(compression_frame, text="Compress:").pack(side='left')
+        self.compression_var = tk.StringVar(value="off")
+        self.compression_combo = ttk.Combobox(compression_frame, textvariable=self.compression_var, values=["off", "zlib", "lzma"], state="readonly", width=5)
+        self.compression_combo.pack(side='left')
         # Toggle button (Open/Close)
         self.open_btn = tk.Button(control_frame, text="Open Ports", command=self.toggle_ports)
         self.open_btn.pack(side='right', padx=10)
+        self.pair_btn = tk.Button(control_frame, text="Auto-pair", command=self.auto_pair)
+        self.pair_btn.pack(side='right', padx=5)
         self.control_error = tk.Label(control_frame, text="Select TX for auto RX", fg="blue")
         self.control_error.pack(side='right', padx=5)
 
@@ -117,18 +285,16 @@ class App:
                 return
             try:
                 msg_bytes = message.encode('ascii', errors='ignore')
-                sent_count = self.__ports_core.send_message(self.device_number, msg_bytes)
-                self.input_status.config(text="")  # Очищаем перед обновлением
-                self.input_status.config(text=f"Sent {sent_count} bytes (portion)!", fg="green")
+                job = self.__ports_core.send_message_async(self.device_number, msg_bytes)  # Writer thread, GUI stays responsive
+                self.send_jobs.append(job)
+                self.input_status.config(text=f"Queued {job.payload_bytes} bytes", fg="blue")
                 self.input_text.delete("1.0", tk.END)
                 self.input_text.focus()
-                self.output_text.insert(tk.END, "\n")
-                self.output_text.insert(tk.END, message)
-                self.debug_text.insert(tk.END, f"Sent {sent_count} bytes: {message}\n")
-                self.debug_text.see(tk.END)
+                self.output_view.append("\n" + message)
+                self.log(logging.DEBUG, f"Queued {job.payload_bytes} bytes ({job.total_bytes} on the wire): {message}")
             except Exception as e:
                 self.input_status.config(text=f"Error: {str(e)}", fg="red")
-                self.debug_text.insert(tk.END, f"Send error: {e}\n")
+                self.log(logging.ERROR, f"Send error: {e}")
 
         def on_enter_key(event):
             send_message()
@@ -136,137 +302,416 @@ class App:
 
         self.input_text.bind("<Return>", on_enter_key)
         self.input_text.bind("<Control-Return>", lambda e: None)
-        send_btn = tk.Button(input_frame, text="Send", command=send_message)
-        send_btn.pack(pady=5)
+        def send_file():
+            if not self.ports_open:
+                self.input_status.config(text="Open ports first!", fg="red")
+                return
+            path = filedialog.askopenfilename(title="Send file")
+            if not path:
+                return
+            try:
+                job = self.__ports_core.send_file_async(self.device_number, path)  # Memory-mapped, streamed by the writer thread
+                self.send_jobs.append(job)
+                self.file_job = job
+                self.pause_btn.config(text="Pause", state="normal")
+                self.cancel_btn.config(state="normal")
+                self.log(logging.INFO, f"Sending file {path} ({job.total_bytes} bytes)")
+            except PortException as e:
+                self.input_status.config(text=f"Error: {e.message}", fg="red")
+                self.log(logging.ERROR, f"File send error: {e.message}")
+
+        def toggle_file_pause():
+            if not self.file_job:
+                return
+            if self.file_job.is_paused:
+                self.file_job.resume()
+                self.pause_btn.config(text="Pause")
+            else:
+                self.file_job.pause()
+                self.pause_btn.config(text="Resume")
+
+        def cancel_file():
+            if self.file_job:
+                self.file_job.cancel()
+
+        buttons_frame = tk.Frame(input_frame)
+        buttons_frame.pack(pady=5)
+        send_btn = tk.Button(buttons_frame, text="Send", command=send_message)
+        send_btn.pack(side='left', padx=2)
+        tk.Button(buttons_frame, text="Send File...", command=send_file).pack(side='left', padx=2)
+        self.pause_btn = tk.Button(buttons_frame, text="Pause", command=toggle_file_pause, state="disabled")
+        self.pause_btn.pack(side='left', padx=2)
+        self.cancel_btn = tk.Button(buttons_frame, text="Cancel", command=cancel_file, state="disabled")
+        self.cancel_btn.pack(side='left', padx=2)
 
         # Output (RX, initial "Not receiving")
         output_frame = tk.LabelFrame(main_container, text="Output (RX)", font=('Arial', 12, 'bold'))
         output_frame.pack(side='right', fill='both', expand=True, padx=5, pady=5)
+        view_frame = tk.Frame(output_frame)
+        view_frame.pack(fill='x', pady=(5, 0))
+        self.hex_mode_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(view_frame, text="Hex", variable=self.hex_mode_var, command=lambda: toggle_hex_mode()).pack(side='left')
+        tk.Label(view_frame, text="Offset:").pack(side='left')
+        self.offset_entry = tk.Entry(view_frame, width=8)
+        self.offset_entry.pack(side='left')
+        self.offset_entry.bind('<Return>', lambda event: goto_offset())
+        tk.Label(view_frame, text="Find:").pack(side='left', padx=(5, 0))
+        self.find_entry = tk.Entry(view_frame, width=10)
+        self.find_entry.pack(side='left')
+        self.find_entry.bind('<Return>', lambda event: find_pattern(1))
+        tk.Button(view_frame, text="<", command=lambda: find_pattern(-1)).pack(side='left')
+        tk.Button(view_frame, text=">", command=lambda: find_pattern(1)).pack(side='left')
+
         self.output_text = scrolledtext.ScrolledText(output_frame, height=10, width=40)
         self.output_text.pack(pady=10, fill="both", expand=True)
+        self.output_view = ScrollbackView(self.output_text, self.output_max_lines, max_chars=self.output_max_chars)
+        hex_frame = tk.Frame(output_frame)
+        hex_scrollbar = tk.Scrollbar(hex_frame)
+        hex_scrollbar.pack(side='right', fill='y')
+        hex_text = tk.Text(hex_frame, height=10, width=40, font=('Courier', 9), wrap='none', state='disabled')
+        hex_text.pack(side='left', fill='both', expand=True)
+        self.hex_view = HexView(hex_text, hex_scrollbar, self.hex_capture)
         self.output_status = tk.Label(output_frame, text="Not receiving", fg="gray")  ### FIX3: Initial not receiving
         self.output_status.pack(pady=5)
 
+        def toggle_hex_mode():
+            if self.hex_mode_var.get():
+                self.output_text.pack_forget()
+                hex_frame.pack(pady=10, fill="both", expand=True, before=self.output_status)
+                self.hex_view.invalidate()
+            else:
+                hex_frame.pack_forget()
+                self.output_text.pack(pady=10, fill="both", expand=True, before=self.output_status)
+
+        def goto_offset():
+            try:
+                offset = int(self.offset_entry.get().strip(), 0)  # Decimal or 0x...
+            except ValueError:
+                self.output_status.config(text="Offset: decimal or 0x hex", fg="red")
+                return
+            if not self.hex_mode_var.get():
+                self.hex_mode_var.set(True)
+                toggle_hex_mode()
+            if offset < self.hex_capture.base_offset:
+                self.output_status.config(text=f"Offset trimmed, oldest kept is 0x{self.hex_capture.base_offset:x}", fg="orange")
+            self.hex_view.goto(offset)
+
+        def find_pattern(direction):
+            try:
+                pattern = parse_pattern(self.find_entry.get())
+            except ValueError:
+                self.output_status.config(text='Find: hex bytes ("0d 0a") or "text', fg="red")
+                return
+            if not pattern:
+                return
+            if pattern != self.hex_capture.pattern:
+                count = self.hex_capture.set_pattern(pattern)  # Index built once, then extended with new data
+                self.log(logging.DEBUG, f"Find {pattern!r}: {count} matches")
+                current = self.hex_capture.base_offset - 1 if direction > 0 else self.hex_capture.end_offset
+            elif self.hex_view.mark:
+                current = self.hex_view.mark[0]
+            else:
+                current = self.hex_capture.base_offset - 1 if direction > 0 else self.hex_capture.end_offset
+            if direction > 0:
+                match = self.hex_capture.next_match(current)
+            else:
+                match = self.hex_capture.previous_match(current)
+            if match is None:
+                self.output_status.config(text=f"No more matches ({len(self.hex_capture.matches)} total)", fg="orange")
+                return
+            if not self.hex_mode_var.get():
+                self.hex_mode_var.set(True)
+                toggle_hex_mode()
+            self.output_status.config(text=f"Match at 0x{match:x} ({len(self.hex_capture.matches)} total)", fg="blue")
+            self.hex_view.goto(match, len(pattern))
+
         # Debug
         debug_frame = tk.LabelFrame(self.__root, text="Debug Log", font=('Arial', 12, 'bold'))
         debug_frame.pack(fill='x', padx=10, pady=5)
         self.debug_text = scrolledtext.ScrolledText(debug_frame, height=5, width=100, state='normal')
         self.debug_text.pack(pady=5, fill='x')
-        self.debug_text.insert(tk.END, "Debug started. Select TX for auto RX, then Open Ports.\n")
+        self.debug_view = ScrollbackView(self.debug_text, self.debug_max_lines)
+        self.log(logging.INFO, "Debug started. Select TX for auto RX, then Open Ports.")
+        self.debug_view.flush()
 
         self.update_status()
 
     def toggle_ports(self):
-        """Toggle open/close (### FIX3: Open starts RX)"""
+        """Toggle open/close (### FIX3: Open starts RX). Open/close run off the UI thread, see on_ports_opened/on_ports_closed"""
+        if self.ports_busy:
+            return
         if not self.ports_open:
             # Open
             tx_selected = self.tx_var.get()
             rx_selected = self.rx_var.get()
-            if not tx_selected or rx_selected == "Select TX first" or not rx_selected.startswith('COM'):
+            if not tx_selected or rx_selected not in self.available_ports:
                 self.control_error.config(text="Select valid TX/RX pair!", fg="red")
                 return
             try:
                 baud = int(self.baud_var.get())
                 timeout = float(self.timeout_var.get())
-                # Create/set TX (slot 1)
-                tx_port = self.__ports_core.create_port(tx_selected)
-                self.__ports_core.set_port(tx_port, 1)
-                # Create/set RX (slot 2)
-                rx_port = self.__ports_core.create_port(rx_selected)
-                self.__ports_core.set_port(rx_port, 2)
-                # Set params
-                self.__ports_core.set_ports_params(baudrate=baud, timeout=timeout)
-                self.tx_port = tx_selected
-                self.rx_port = rx_selected
-                self.ports_open = True
-                self.open_btn.config(text="Close Ports")
-                self.control_error.config(text=f"Ports opened: TX {tx_selected}, RX {rx_selected}", fg="green")
-                self.debug_text.insert(tk.END, f"Ports opened TX {tx_selected} RX {rx_selected} baud {baud} timeout {timeout}\n")
-                self.update_status()
-                # ### FIX3/FIX4: Start RX after open
-                self.start_receiving(self.device_number)
-                self.output_status.config(text="Receiving...", fg="blue")
-            except PortException as e:
-                self.control_error.config(text=f"Error: {e.message}", fg="red")
-                self.debug_text.insert(tk.END, f"Open error: {e.message}\n")
+            except ValueError:
+                self.control_error.config(text="Invalid baudrate or timeout", fg="red")
+                return
+            compression = self.compression_var.get()
+            self.__ports_core.compression = None if compression == "off" else compression
+            self.__ports_core.framing = None if compression == "off" else "cobs"  # Per-message decisions need frame boundaries
+            self.set_ports_busy("Opening ports...")
+            self.__ports_core.run_in_background(
+                lambda: self.__ports_core.open_device(self.device_number, tx_selected, rx_selected, baudrate=baud, timeout=timeout),
+                lambda error: self.port_events.append(("opened", error, tx_selected, rx_selected, baud, timeout)),
+            )
         else:
-            # Close
-            try:
-                self.__ports_core.end_receiving()
-                self.__ports_core.close_active_ports()
-                self.ports_open = False
-                self.open_btn.config(text="Open Ports")
-                self.tx_port = None
-                self.rx_port = None
-                self.portion_bytes = 0
-                self.output_text.delete("1.0", tk.END)
-                self.output_status.config(text="Not receiving", fg="gray")  # Информируем о закрытии
-                self.input_status.config(text="Ports closed - ready to open")  # Информируем о состоянии отправки
-                self.current_portion = b""  # Сбрасываем буфер
-                self.control_error.config(text="Ports closed - no sending/receiving", fg="orange")
-                self.debug_text.insert(tk.END, "Ports closed, RX stopped.\n")
-                self.update_status()  # Обновляем статусное окно
-            except Exception as e:
-                self.control_error.config(text=f"Close error: {str(e)}", fg="red")
+            # Close: stop sending/rendering now, the ports close in the background
+            self.ports_open = False
+            self.set_ports_busy("Closing ports...")
+            self.__ports_core.run_in_background(
+                self.__ports_core.close_active_ports,
+                lambda error: self.port_events.append(("closed", error)),
+            )
+
+    def set_ports_busy(self, text):
+        self.ports_busy = True
+        self.open_btn.config(state="disabled")
+        self.control_error.config(text=text, fg="blue")
+
+    def on_ports_opened(self, error, tx_selected, rx_selected, baud, timeout):
+        self.ports_busy = False
+        self.open_btn.config(state="normal")
+        if error:
+            message = error.message if isinstance(error, PortException) else str(error)
+            self.control_error.config(text=f"Error: {message}", fg="red")
+            self.log(logging.ERROR, f"Open error: {message}")
+            return
+        self.tx_port = tx_selected
+        self.rx_port = rx_selected
+        self.ports_open = True
+        self.open_btn.config(text="Close Ports")
+        self.control_error.config(text=f"Ports opened: TX {tx_selected}, RX {rx_selected}", fg="green")
+        self.log(logging.INFO, f"Ports opened TX {tx_selected} RX {rx_selected} baud {baud} timeout {timeout}")
+        self.log(logging.INFO, f"RX started for device {self.device_number}")
+        self.output_status.config(text="Receiving...", fg="blue")
+        self.update_status()
+
+    def on_ports_closed(self, error):
+        self.ports_busy = False
+        self.open_btn.config(state="normal", text="Open Ports")
+        if error:
+            self.control_error.config(text=f"Close error: {str(error)}", fg="red")
+            self.log(logging.ERROR, f"Close error: {error}")
+        else:
+            self.control_error.config(text="Ports closed - no sending/receiving", fg="orange")
+            self.log(logging.INFO, "Ports closed, RX stopped.")
+        self.tx_port = None
+        self.rx_port = None
+        self.output_view.clear()
+        self.hex_capture.clear()
+        self.rx_stream_bytes = 0
+        self.hex_view.mark = None
+        self.hex_view.invalidate()
+        self.output_status.config(text="Not receiving", fg="gray")  # Информируем о закрытии
+        self.input_status.config(text="Ports closed - ready to open")  # Информируем о состоянии отправки
+        self.rx_buffer.clear()  # Сбрасываем буфер
+        self.send_jobs.clear()
+        self.file_job = None
+        self.pause_btn.config(text="Pause", state="disabled")
+        self.cancel_btn.config(state="disabled")
+        self.update_status()  # Обновляем статусное окно
+
+    def apply_port_params(self, event=None):
+        """Baud/timeout edits go to the live ports without reopening them"""
+        if not self.ports_open:
+            return
+        try:
+            baud = int(self.baud_var.get())
+            timeout = float(self.timeout_var.get())
+        except ValueError:
+            self.control_error.config(text="Invalid baudrate or timeout", fg="red")
+            return
+        self.__ports_core.run_in_background(
+            lambda: self.__ports_core.set_ports_params(baudrate=baud, timeout=timeout),
+            lambda error: self.port_events.append(("params", error, baud, timeout)),
+        )
 
     def update_status(self):
         tx_str = self.tx_port if self.tx_port else "N/A"
         rx_str = self.rx_port if self.rx_port else "N/A"
-        self.status_label.config(text=f"TX Port: {tx_str}\nRX Port: {rx_str}")
-
-    def start_receiving(self, device_number):
-        try:
-            self.__ports_core.start_receiving(device_number)
-            self.output_status.config(text="Receiving...", fg="blue")
-            self.debug_text.insert(tk.END, f"RX started for device {device_number}\n")
-        except Exception as e:
-            self.output_status.config(text=f"Error: {str(e)}", fg="red")
-            self.debug_text.insert(tk.END, f"RX start error: {e}\n")
+        text = f"TX Port: {tx_str}\nRX Port: {rx_str}"
+        if self.ports_open:
+            tx = self.__ports_core.port_stats(PortsCore.TX_SLOTS[self.device_number]).snapshot()
+            rx = self.__ports_core.port_stats(PortsCore.RX_SLOTS[self.device_number]).snapshot()
+            text += (
+                f"\n\nTX: {tx['tx_bytes']} B, {tx['tx_writes']} writes"
+                f"\n    {tx['tx_bytes_per_second']:.0f} B/s"
+                f"\nRX: {rx['rx_bytes']} B, {rx['rx_reads']} reads"
+                f"\n    {rx['rx_bytes_per_second']:.0f} B/s"
+                f"\n    {rx['empty_reads']} empty reads"
+                f"\nPortions: {rx['portions']}"
+                f"\nUI queue: {rx['ui_queue_bytes']} B"
+            )
+            if "compression_gain" in tx:
+                saved = tx["compression_raw_bytes"] - tx["compression_wire_bytes"]
+                text += (
+                    f"\n\nCompression: x{tx['compression_gain']:.2f}"
+                    f"\n    saved {saved} B"
+                    f"\n    effective {tx['tx_bytes_per_second'] * tx['compression_gain']:.0f} B/s"
+                )
+        self.status_label.config(text=text)
 
     def check_portion_end(self):
-        if hasattr(self, 'current_portion') and self.current_portion and self.ports_open:
-            # Если данные накопились, но новых не поступает (условно после паузы)
-            self.output_text.insert(tk.END, "\n")  # Новая строка
-            self.output_text.insert(tk.END, self.current_portion.decode(errors='ignore'))
-            self.output_status.config(text=f"Received {self.portion_bytes} bytes in portion", fg="green")
+        """Periodic UI tick: render every portion the RX thread finished since the last tick in one batch"""
+        portions = self.rx_buffer.drain()
+        if self.rx_buffer.dropped_bytes != self.reported_dropped_bytes:
+            self.log(logging.WARNING, f"UI fell behind: dropped {self.rx_buffer.dropped_bytes - self.reported_dropped_bytes} bytes")
+            self.reported_dropped_bytes = self.rx_buffer.dropped_bytes
+
+        if portions and self.ports_open:
+            self.output_view.append("".join("\n" + portion.data.decode(errors='ignore') for portion in portions))
+            for portion in portions:
+                self.hex_capture.append(portion.data, portion.offset)  # Dropped portions become marked gaps
+            self.hex_view.invalidate()
+            last = portions[-1]
+            self.output_status.config(text=f"Received {last.byte_count} bytes in portion ({last.duration * 1000:.0f} ms)", fg="green")
             self.update_status()
-            self.current_portion = b""
-            self.portion_bytes = 0
             self.__root.after(2000, lambda: self.output_status.config(text="Receiving...", fg="blue") if self.ports_open else None)
-            
+
+        for portion in portions:
+            self.rx_log_bytes += portion.byte_count
+            self.rx_log_chunks += portion.chunk_count
+            self.rx_log_portions += 1
+        self.log_rx_summary()
+
+        self.update_send_status()
+        self.apply_port_events()
         if self.ports_open:
-            self.__root.after(100, self.check_portion_end)
-
-    def emit_received_wrapper(self, message: bytes, bytes_count: int):
-        """### FIX4: Debug emit, incremental for sync"""
-        def update_output():
-            if not hasattr(self, 'current_portion'):
-                self.current_portion = b""  # Инициализируем буфер, если его нет
-            self.debug_text.insert(tk.END, f"Emit called with {len(message)} bytes (portion {bytes_count})\n")
-
-            if bytes_count > 0:  # Накопление байтов
-                self.current_portion += message  # Добавляем текущий байт
-                self.portion_bytes += bytes_count  # Увеличиваем счетчик для текущей порции
-            else:  # Предполагаем конец порции (например, после паузы, но без явного сигнала)
-                if self.current_portion:  # Если есть накопленные данные
-                    self.output_text.insert(tk.END, "\n")  # Новая строка перед порцией
-                    self.output_text.insert(tk.END, self.current_portion.decode(errors='ignore'))  # Отображаем всю порцию
-                    self.output_status.config(text=f"Received {self.portion_bytes} bytes in portion", fg="green")
-                    self.update_status()
-                    self.current_portion = b""  # Сбрасываем буфер
-                    self.portion_bytes = 0  # Сбрасываем счетчик
-                    self.__root.after(2000, lambda: self.output_status.config(text="Receiving...", fg="blue") if self.ports_open else None)
-                
-
-            self.output_text.see(tk.END)
-            self.debug_text.see(tk.END)
-
-        self.__root.after(10, update_output)
+            self.__ports_core.port_stats(PortsCore.RX_SLOTS[self.device_number]).ui_queue_bytes = self.rx_buffer.pending_bytes()
+            self.update_status()  # Live stats
+
+        # One insert per widget per tick
+        self.output_view.flush()
+        self.hex_view.flush()  # Visible rows only, and only when shown
+        self.debug_view.flush()
+        self.__root.after(100, self.check_portion_end)  # Keep ticking: ports may be opened later
+
+    def apply_port_events(self):
+        """Apply events queued by background threads (port lifecycle, hotplug, auto-pair)"""
+        while self.port_events:
+            event = self.port_events.popleft()
+            if event[0] == "opened":
+                self.on_ports_opened(*event[1:])
+            elif event[0] == "closed":
+                self.on_ports_closed(*event[1:])
+            elif event[0] == "params":
+                _, error, baud, timeout = event
+                if error:
+                    self.control_error.config(text=f"Params error: {error}", fg="red")
+                    self.log(logging.ERROR, f"Params error: {error}")
+                else:
+                    self.control_error.config(text=f"Applied baud {baud}, timeout {timeout}", fg="green")
+                    self.log(logging.INFO, f"Live ports reconfigured: baud {baud} timeout {timeout}")
+            elif event[0] == "rx_error":
+                _, name, error = event
+                self.output_status.config(text=f"Receiving stopped: {error}", fg="red")
+                self.log(logging.ERROR, f"RX on {name} stopped: {error}")
+            elif event[0] == "ports":
+                _, added, removed = event
+                self.available_ports = self.__ports_core.get_available_ports()
+                self.tx_combo.config(values=self.available_ports)
+                self.rx_combo.config(values=self.available_ports)
+                if added:
+                    self.log(logging.INFO, f"Ports added: {', '.join(added)}")
+                if removed:
+                    self.log(logging.WARNING, f"Ports removed: {', '.join(removed)}")
+                self.on_tx_change()
+            else:
+                _, pairs = event
+                self.pair_btn.config(state="normal")
+                if isinstance(pairs, Exception):
+                    self.control_error.config(text=f"Auto-pair error: {pairs}", fg="red")
+                    self.log(logging.ERROR, f"Auto-pair error: {pairs}")
+                    continue
+                self.tx_to_rx.update(pairs)
+                self.control_error.config(text=f"Auto-pair found {len(pairs)} pairs", fg="green" if pairs else "orange")
+                self.log(logging.INFO, "Auto-pair: " + (", ".join(f"{tx}->{rx}" for tx, rx in pairs.items()) or "no pairs"))
+                self.on_tx_change()
+
+    def auto_pair(self):
+        """Probe every free port in a background thread; the result arrives as a port event"""
+        if self.ports_open or self.ports_busy:
+            self.control_error.config(text="Close ports before Auto-pair", fg="red")
+            return
+        candidates = list(self.available_ports)
+        probe_core = PortsCore()  # Own core: probe ports never touch the app's registry
+        try:
+            probe_core.set_ports_params(baudrate=int(self.baud_var.get()))
+        except ValueError:
+            pass
+        self.pair_btn.config(state="disabled")
+        self.control_error.config(text=f"Probing {len(candidates)} ports...", fg="blue")
+
+        def discover():
+            try:
+                pairs = probe_core.discover_pairs(candidates)
+            except Exception as e:
+                pairs = e
+            self.port_events.append(("pairs", pairs))
+
+        threading.Thread(target=discover, daemon=True).start()
+
+    def update_send_status(self):
+        """Report writer thread progress: bytes actually written, not bytes queued"""
+        if not self.send_jobs:
+            return
+        for job in [job for job in self.send_jobs if job.is_done]:
+            self.send_jobs.remove(job)
+            if job.error:
+                self.input_status.config(text=f"Send error after {job.payload_sent_bytes} bytes: {job.error}", fg="red")
+                self.log(logging.ERROR, f"Send error after {job.payload_sent_bytes}/{job.payload_bytes} bytes: {job.error}")
+            else:
+                self.input_status.config(text=f"Sent {job.payload_bytes} bytes (portion)!", fg="green")
+                self.log(logging.INFO, f"Sent {job.payload_bytes} bytes ({job.sent_bytes} on the wire) in {job.finished_at - job.queued_at:.2f} s")
+        if self.file_job and self.file_job.is_done:
+            self.file_job = None
+            self.pause_btn.config(text="Pause", state="disabled")
+            self.cancel_btn.config(state="disabled")
+        if self.file_job and self.file_job.started_at is not None:
+            job = self.file_job
+            eta = f"{job.eta:.0f} s" if job.eta is not None else "?"
+            state = "Paused" if job.is_paused else "Sending file"
+            self.input_status.config(text=f"{state}: {job.percent:.1f}% ({job.sent_bytes}/{job.total_bytes}), {job.throughput:.0f} B/s, ETA {eta}", fg="blue")
+        elif self.send_jobs:
+            sent = sum(job.payload_sent_bytes for job in self.send_jobs)
+            total = sum(job.payload_bytes for job in self.send_jobs)
+            self.input_status.config(text=f"Sending... {sent}/{total} bytes", fg="blue")
+
+    def log(self, level: int, text: str) -> None:
+        """Queue a debug log line; shown on the next tick if level passes debug_level"""
+        if level >= self.debug_level:
+            self.debug_view.append(f"[{logging.getLevelName(level)}] {text}\n")
+
+    def log_rx_summary(self) -> None:
+        """Aggregate RX traffic into one debug line per rx_log_interval instead of a line per chunk"""
+        now = time.monotonic()
+        if now - self.rx_log_at < self.rx_log_interval:
+            return
+        if self.rx_log_bytes:
+            self.log(logging.INFO, f"Received {self.rx_log_bytes} bytes in {self.rx_log_chunks} chunks ({self.rx_log_portions} portions)")
+        self.rx_log_bytes = 0
+        self.rx_log_chunks = 0
+        self.rx_log_portions = 0
+        self.rx_log_at = now
+
+    def emit_portion_wrapper(self, portion: Portion):
+        """Called from the RX thread: only queue the finished portion, the UI tick renders it"""
+        portion.offset = self.rx_stream_bytes
+        self.rx_stream_bytes += portion.byte_count
+        self.rx_buffer.push(portion)
 
     def on_closing(self):
         try:
-            if self.ports_open:
-                self.toggle_ports()  # Close on exit
+            self.ports_open = False
+            self.__ports_core.close_active_ports()  # Close on exit; fast, readers/writers are woken by cancel_read/cancel_write
+            self.__ports_core.stop_port_watch()
             self.__root.destroy()
         except Exception as e:
             pass
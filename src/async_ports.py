@@ -0,0 +1,154 @@
+from src.ports_core import PortsCore, PortException
+from collections import deque
+import asyncio
+import serial
+import os
+
+class AsyncPort:
+    """asyncio wrapper over an open serial port, driven by the event loop's reader/writer callbacks.
+
+    No thread per port: the loop watches the port's file descriptor (POSIX only; pyserial
+    opens it with O_NONBLOCK). Reading pauses while max_buffer bytes are waiting to be consumed.
+    """
+    def __init__(self, port: serial.Serial, max_chunk_size: int = 4096, max_buffer: int = 1 << 20):
+        try:
+            self.fd: int = port.fileno()
+        except Exception:
+            raise PortException(f"Port {port.name} has no file descriptor for asyncio")
+        self.port: serial.Serial = port
+        self.max_chunk_size: int = max_chunk_size
+        self.max_buffer: int = max_buffer
+        self.is_eof: bool = False
+        self.__loop: asyncio.AbstractEventLoop | None = None
+        self.__chunks: deque[bytes] = deque()
+        self.__buffered: int = 0
+        self.__is_reading: bool = False
+        self.__read_waiter: asyncio.Future | None = None
+        self.__write_waiter: asyncio.Future | None = None
+
+    async def __aenter__(self) -> "AsyncPort":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __aiter__(self) -> "AsyncPort":
+        return self
+
+    async def __anext__(self) -> bytes:
+        chunk = await self.read_chunk()
+        if not chunk:
+            raise StopAsyncIteration
+        return chunk
+
+    def start(self) -> None:
+        self.__loop = asyncio.get_running_loop()
+        self.resume_reading()
+
+    def close(self) -> None:
+        self.pause_reading()
+        if self.__write_waiter and not self.__write_waiter.done():
+            self.__loop.remove_writer(self.fd)
+            self.__write_waiter.set_exception(PortException("Port closed"))
+        self.is_eof = True
+        self.wake_reader()
+        self.port.close()
+
+    def pause_reading(self) -> None:
+        if self.__is_reading:
+            self.__loop.remove_reader(self.fd)
+            self.__is_reading = False
+
+    def resume_reading(self) -> None:
+        if not self.__is_reading and not self.is_eof:
+            self.__loop.add_reader(self.fd, self.on_readable)
+            self.__is_reading = True
+
+    def wake_reader(self) -> None:
+        if self.__read_waiter and not self.__read_waiter.done():
+            self.__read_waiter.set_result(None)
+
+    def on_readable(self) -> None:
+        try:
+            data = os.read(self.fd, self.max_chunk_size)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:  # Readable with nothing to read: device hung up
+            self.pause_reading()
+            self.is_eof = True
+        else:
+            self.__chunks.append(data)
+            self.__buffered += len(data)
+            if self.__buffered >= self.max_buffer:
+                self.pause_reading()  # Backpressure until the consumer catches up
+        self.wake_reader()
+
+    async def read_chunk(self) -> bytes:
+        """Everything received so far (waits for at least one byte); b"" at end of stream"""
+        while not self.__chunks:
+            if self.is_eof:
+                return b""
+            self.__read_waiter = self.__loop.create_future()
+            try:
+                await self.__read_waiter
+            finally:
+                self.__read_waiter = None
+        chunk = b"".join(self.__chunks)
+        self.__chunks.clear()
+        self.__buffered = 0
+        self.resume_reading()
+        return chunk
+
+    async def write(self, data: bytes) -> int:
+        """Write all of data, yielding to the loop whenever the OS output buffer is full"""
+        view = memoryview(data)
+        sent = 0
+        while sent < len(view):
+            try:
+                sent += os.write(self.fd, view[sent:])
+            except BlockingIOError:
+                self.__write_waiter = self.__loop.create_future()
+                self.__loop.add_writer(self.fd, self.on_writable)
+                try:
+                    await self.__write_waiter
+                finally:
+                    self.__write_waiter = None
+        return sent
+
+    def on_writable(self) -> None:
+        self.__loop.remove_writer(self.fd)
+        if self.__write_waiter and not self.__write_waiter.done():
+            self.__write_waiter.set_result(None)
+
+
+class AsyncPortPair:
+    """TX/RX pair for `async with`: write() goes to TX, read_chunk() and `async for` read RX."""
+    def __init__(self, tx: AsyncPort, rx: AsyncPort):
+        self.tx: AsyncPort = tx
+        self.rx: AsyncPort = rx
+
+    @classmethod
+    def open(cls, core: PortsCore, tx_name: str, rx_name: str) -> "AsyncPortPair":
+        """Create both ports with the core's baudrate/timeout settings"""
+        return cls(AsyncPort(core.create_port(tx_name)), AsyncPort(core.create_port(rx_name)))
+
+    async def __aenter__(self) -> "AsyncPortPair":
+        self.tx.start()
+        self.rx.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.tx.close()
+        self.rx.close()
+
+    def __aiter__(self) -> AsyncPort:
+        return self.rx
+
+    async def read_chunk(self) -> bytes:
+        return await self.rx.read_chunk()
+
+    async def write(self, data: bytes) -> int:
+        return await self.tx.write(data)
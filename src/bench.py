@@ -0,0 +1,311 @@
+"""Throughput/latency benchmarks for PortsCore without hardware.
+
+Transports: pyserial "loop://" URLs and Linux pty pairs (two ptys joined by a bridge
+thread, like a null-modem cable). Each case sends a payload with send_message in
+message_size pieces and receives it with start_receiving, then reports bytes/s, CPU
+cost per byte, end-to-end latency percentiles and dropped/garbled bytes (messages are
+lined up by the sequence number and send time embedded in each one).
+
+    python -m src.bench --sizes 4096 262144 --modes chunk byte --output bench.json
+    python -m src.bench --output new.json --compare bench.json
+
+Note: loop:// and ptys do not emulate the line rate, so baudrate only matters on real ports.
+loop:// ports have no file descriptor, so reactor modes are skipped for them; every
+result records the read path ("reactor" or "thread") that actually ran.
+"""
+from src.ports_core import PortsCore
+from bisect import bisect_left
+from itertools import product
+import argparse
+import platform
+import threading
+import struct
+import serial
+import json
+import time
+import sys
+import os
+
+HEADER = struct.Struct("<IQ")  # Message sequence number, send time (perf_counter_ns)
+READ_MODES = {
+    "chunk": {"read_mode": "chunk", "use_reactor": True},  # Reactor where the port has an fd
+    "chunk-thread": {"read_mode": "chunk", "use_reactor": False},
+    "byte": {"read_mode": "byte", "use_reactor": False},
+}
+
+
+class PtyPair:
+    """Two ptys whose master ends are bridged, giving a TX/RX serial port pair (Linux)"""
+    def __init__(self):
+        self.__tx_master, tx_slave = os.openpty()
+        self.__rx_master, rx_slave = os.openpty()
+        self.tx_name: str = os.ttyname(tx_slave)
+        self.rx_name: str = os.ttyname(rx_slave)
+        self.__slaves = (tx_slave, rx_slave)
+        self.__thread = threading.Thread(target=self.bridge_thread_body, daemon=True)
+        self.__thread.start()
+
+    def bridge_thread_body(self) -> None:
+        while True:
+            try:
+                data = os.read(self.__tx_master, 1 << 16)
+                if not data:
+                    return
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(self.__rx_master, view):]
+            except OSError:
+                return
+
+    def close(self) -> None:
+        for fd in (*self.__slaves, self.__tx_master, self.__rx_master):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def make_payload(size: int, message_size: int) -> list[bytes]:
+    """Deterministic payload split into messages, each starting with a HEADER placeholder"""
+    pattern = bytes(range(256)) * (message_size // 256 + 1)
+    return [pattern[:min(message_size, size - offset)] for offset in range(0, size, message_size)]
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def diff_message(arrived: bytes, message: bytes) -> tuple[int, int]:
+    """(missing, garbled) bytes of one message: whatever lies between the common prefix and suffix"""
+    if arrived == message:
+        return 0, 0
+    limit = min(len(arrived), len(message))
+    prefix = 0
+    while prefix < limit and arrived[prefix] == message[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and arrived[-1 - suffix] == message[-1 - suffix]:
+        suffix += 1
+    return max(0, len(message) - len(arrived)), len(arrived) - prefix - suffix
+
+
+def match_messages(received: bytearray, sent: list[bytes], send_times: list[int],
+                   chunk_ends: list[int], chunk_times: list[int]) -> dict:
+    """Line received bytes up with the sent messages by their embedded HEADER (sequence, send time).
+
+    A lost or garbled stretch only affects the messages it touches: after it, matching resumes
+    at the next header found in the stream. Latency is the arrival of the chunk holding a
+    message's last byte minus its send time.
+    """
+    headers = [HEADER.pack(sequence, sent_at) if len(message) >= HEADER.size else None
+               for sequence, (message, sent_at) in enumerate(zip(sent, send_times))]
+    dropped_messages = garbled_messages = dropped_bytes = garbled_bytes = 0
+    latencies: list[float] = []
+    position = sequence = 0
+    while sequence < len(sent):
+        message, header = sent[sequence], headers[sequence]
+        if header is None or received.startswith(header, position):
+            end = position + len(message)
+            next_header = headers[sequence + 1] if sequence + 1 < len(sent) else None
+            if next_header and not received.startswith(next_header, end):
+                next_at = received.find(next_header, position + HEADER.size)
+                if next_at >= 0:
+                    end = next_at  # Bytes were lost or added inside this message
+            arrived = bytes(received[position:end])
+            missing, mismatches = diff_message(arrived, message)
+            dropped_bytes += missing
+            garbled_bytes += mismatches
+            if missing == len(message):
+                dropped_messages += 1
+            elif mismatches or missing:
+                garbled_messages += 1
+            if len(arrived) >= len(message):
+                chunk = bisect_left(chunk_ends, end)
+                if chunk < len(chunk_times):
+                    latencies.append((chunk_times[chunk] - send_times[sequence]) / 1e6)
+            position = min(end, len(received))
+            sequence += 1
+            continue
+        # Resync: the nearest later message whose header is still in the stream
+        found = None
+        for candidate in range(sequence, len(sent)):
+            if headers[candidate] is None:
+                break
+            found_at = received.find(headers[candidate], position)
+            if found_at >= 0:
+                found = (candidate, found_at)
+                break
+        next_sequence, next_position = found if found else (len(sent), len(received))
+        garbled_bytes += next_position - position  # Bytes that belong to no intact header
+        for lost in range(sequence, next_sequence):
+            dropped_messages += 1
+            dropped_bytes += len(sent[lost])
+        position, sequence = next_position, next_sequence
+    garbled_bytes += len(received) - position  # Trailing bytes after the last message
+    return {
+        "messages": len(sent),
+        "dropped_messages": dropped_messages,
+        "garbled_messages": garbled_messages,
+        "dropped_bytes": dropped_bytes,
+        "garbled_bytes": garbled_bytes,
+        "latencies": latencies,
+    }
+
+
+def run_case(transport: str, size: int, message_size: int, baudrate: int, timeout: float, mode: str,
+             idle_limit: float = 2.0) -> dict:
+    core = PortsCore()
+    for attr, value in READ_MODES[mode].items():
+        setattr(core, attr, value)
+    core.set_ports_params(baudrate=baudrate, timeout=timeout)
+
+    pty_pair = None
+    if transport == "loop":
+        port = serial.serial_for_url("loop://", baudrate=baudrate, timeout=timeout)
+        core.set_port(port, 1)
+        core.set_port(port, 2)
+    else:
+        pty_pair = PtyPair()
+        core.set_port(core.create_port(pty_pair.tx_name), 1)
+        core.set_port(core.create_port(pty_pair.rx_name), 2)
+
+    received = bytearray()
+    chunk_ends: list[int] = []  # Cumulative received size after each chunk
+    chunk_times: list[int] = []  # perf_counter_ns when each chunk arrived
+
+    def on_received(message: bytes, bytes_count: int) -> None:
+        received.extend(message)
+        chunk_ends.append(len(received))
+        chunk_times.append(time.perf_counter_ns())
+
+    core.emit_received = on_received
+    messages = make_payload(size, message_size)
+    send_times: list[int] = []
+    sent: list[bytes] = []
+    expected_size = 0
+
+    core.start_receiving(1)
+    read_path = "thread" if core.receivers[PortsCore.RX_SLOTS[1]].thread else "reactor"  # What "mode" really ran
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    for sequence, body in enumerate(messages):
+        sent_at = time.perf_counter_ns()
+        message = HEADER.pack(sequence, sent_at) + body[HEADER.size:] if len(body) >= HEADER.size else body
+        send_times.append(sent_at)
+        sent.append(message)
+        expected_size += len(message)
+        core.send_message(1, message)
+
+    last_size, last_change = -1, time.perf_counter()
+    while len(received) < expected_size and time.perf_counter() - last_change < idle_limit:
+        if len(received) != last_size:
+            last_size, last_change = len(received), time.perf_counter()
+        time.sleep(0.001)
+    elapsed = (chunk_times[-1] / 1e9 - started) if chunk_times else time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    core.close_active_ports()
+    if pty_pair:
+        pty_pair.close()
+
+    check = match_messages(received, sent, send_times, chunk_ends, chunk_times)
+    latencies = check.pop("latencies")
+    return {
+        "transport": transport,
+        "size": size,
+        "message_size": message_size,
+        "baudrate": baudrate,
+        "timeout": timeout,
+        "mode": mode,
+        "read_path": read_path,
+        "received_bytes": len(received),
+        **check,
+        "chunks": len(chunk_ends),
+        "seconds": elapsed,
+        "bytes_per_second": len(received) / elapsed if elapsed > 0 else None,
+        "cpu_ns_per_byte": cpu * 1e9 / len(received) if received else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies) if latencies else None,
+        },
+    }
+
+
+def case_key(result: dict) -> tuple:
+    return tuple(result[key] for key in ("transport", "size", "message_size", "baudrate", "timeout", "mode"))
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> list[str]:
+    """Lines describing cases whose throughput dropped or CPU/latency grew by more than tolerance"""
+    with open(baseline_path) as file:
+        baseline = {case_key(result): result for result in json.load(file)["results"]}
+    regressions = []
+    for result in results:
+        old = baseline.get(case_key(result))
+        if not old:
+            continue
+        checks = [
+            ("bytes/s", result["bytes_per_second"], old["bytes_per_second"], -1),
+            ("cpu ns/byte", result["cpu_ns_per_byte"], old["cpu_ns_per_byte"], 1),
+            ("p99 latency ms", result["latency_ms"]["p99"], old["latency_ms"]["p99"], 1),
+        ]
+        for name, new_value, old_value, worse in checks:
+            if new_value is None or not old_value:
+                continue
+            change = (new_value - old_value) / old_value
+            if change * worse > tolerance:
+                regressions.append(f"{case_key(result)}: {name} {old_value:.4g} -> {new_value:.4g} ({change:+.0%})")
+        if result["dropped_bytes"] + result["garbled_bytes"] > old["dropped_bytes"] + old["garbled_bytes"]:
+            regressions.append(f"{case_key(result)}: dropped/garbled bytes grew")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.bench", description="PortsCore throughput/latency benchmarks")
+    parser.add_argument("--transports", nargs="+", default=["loop", "pty"], choices=["loop", "pty"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[4096, 262144], help="payload sizes in bytes")
+    parser.add_argument("--message-size", type=int, default=1024, help="bytes per send_message call")
+    parser.add_argument("--bauds", nargs="+", type=int, default=[115200])
+    parser.add_argument("--timeouts", nargs="+", type=float, default=[0.1])
+    parser.add_argument("--modes", nargs="+", default=["chunk", "chunk-thread"], choices=list(READ_MODES))
+    parser.add_argument("--output", help="write results as JSON here")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative change counted as a regression")
+    args = parser.parse_args(argv)
+
+    transports = [transport for transport in args.transports if transport != "pty" or sys.platform.startswith("linux")]
+    results = []
+    for transport, size, baudrate, timeout, mode in product(transports, args.sizes, args.bauds, args.timeouts, args.modes):
+        if transport == "loop" and READ_MODES[mode]["use_reactor"]:
+            continue  # loop:// has no fd, the reactor mode would just rerun the threaded reader
+        result = run_case(transport, size, args.message_size, baudrate, timeout, mode)
+        results.append(result)
+        rate = result["bytes_per_second"] or 0
+        cpu = result["cpu_ns_per_byte"] or 0
+        p99 = result["latency_ms"]["p99"]
+        print(f"{transport:4} {mode:12} {result['read_path']:7} size={size:<9} baud={baudrate:<7} timeout={timeout:<5} "
+              f"{rate / 1e6:8.2f} MB/s {cpu:8.0f} ns/B p99={p99 if p99 is None else round(p99, 2)} ms "
+              f"dropped={result['dropped_bytes']} garbled={result['garbled_bytes']}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, file, indent=2)
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+from itertools import accumulate
+import threading
+import struct
+import time
+import os
+
+class CaptureRecorder:
+    """Receive-to-disk sink with size/time based file rotation.
+
+    write() is called from the receive path and only appends to an in-memory batch;
+    a flusher thread writes the batch out at least every flush_interval seconds (or as
+    soon as it reaches batch_size), so disk latency never stalls the reader.
+    With index=True every chunk also gets a record in a ".idx" file next to the data:
+    INDEX_RECORD = (unix time float64, offset in data file uint64, length uint32).
+    """
+    INDEX_RECORD = struct.Struct("<dQI")
+
+    def __init__(self, directory: str, prefix: str = "capture", max_file_bytes: int = 256 << 20,
+                 max_file_seconds: float | None = None, index: bool = False,
+                 flush_interval: float = 0.5, batch_size: int = 1 << 20, max_pending_bytes: int = 64 << 20):
+        self.directory: str = directory
+        self.prefix: str = prefix
+        self.max_file_bytes: int = max_file_bytes
+        self.max_file_seconds: float | None = max_file_seconds
+        self.index: bool = index
+        self.flush_interval: float = flush_interval
+        self.batch_size: int = batch_size
+        self.max_pending_bytes: int = max_pending_bytes  # Beyond this new data is dropped (disk too slow)
+
+        self.recorded_bytes: int = 0
+        self.dropped_bytes: int = 0
+        self.files: list[str] = []  # Data files written so far, oldest first
+
+        self.__lock = threading.Lock()
+        self.__batch: bytearray = bytearray()
+        self.__batch_index: list[tuple[float, int]] = []  # (timestamp, length) per chunk in __batch
+        self.__flush_needed = threading.Event()
+        self.__data_file = None
+        self.__index_file = None
+        self.__file_bytes: int = 0
+        self.__file_opened_at: float = 0.0
+        self.__file_number: int = 0
+        self.is_running: bool = False
+        self.__thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self.is_running = True
+        self.__thread = threading.Thread(target=self.flush_thread_body, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Flush everything still buffered and close the current file"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        self.__flush_needed.set()
+        self.__thread.join()
+        self.__thread = None
+
+    def write(self, data: bytes, timestamp: float | None = None) -> None:
+        with self.__lock:
+            if len(self.__batch) + len(data) > self.max_pending_bytes:
+                self.dropped_bytes += len(data)
+                return
+            self.__batch += data
+            if self.index:
+                self.__batch_index.append((time.time() if timestamp is None else timestamp, len(data)))
+            if len(self.__batch) >= self.batch_size:
+                self.__flush_needed.set()
+
+    def flush_thread_body(self) -> None:
+        while self.is_running:
+            self.__flush_needed.wait(self.flush_interval)
+            self.__flush_needed.clear()
+            self.flush()
+        self.flush()
+        self.close_file()
+
+    def flush(self) -> None:
+        with self.__lock:
+            batch, self.__batch = self.__batch, bytearray()
+            batch_index, self.__batch_index = self.__batch_index, []
+        if not batch:
+            return
+
+        view = memoryview(batch)
+        chunk_starts = [0, *accumulate(length for _, length in batch_index)]
+        chunk_number = 0
+        position = 0
+        while position < len(batch):
+            self.rotate_if_needed()
+            piece = view[position:position + self.max_file_bytes - self.__file_bytes]
+            if self.index:
+                # Records for chunks starting in this piece; a chunk split by rotation is indexed in its first file
+                records = bytearray()
+                while chunk_number < len(batch_index) and chunk_starts[chunk_number] < position + len(piece):
+                    timestamp, length = batch_index[chunk_number]
+                    records += self.INDEX_RECORD.pack(timestamp, self.__file_bytes + chunk_starts[chunk_number] - position, length)
+                    chunk_number += 1
+                self.__index_file.write(records)
+            self.__data_file.write(piece)
+            self.__file_bytes += len(piece)
+            self.recorded_bytes += len(piece)
+            position += len(piece)
+        view.release()
+        self.__data_file.flush()
+        if self.__index_file:
+            self.__index_file.flush()
+
+    def rotate_if_needed(self) -> None:
+        too_big = self.__file_bytes >= self.max_file_bytes
+        too_old = self.max_file_seconds is not None and time.monotonic() - self.__file_opened_at >= self.max_file_seconds
+        if self.__data_file is None or too_big or too_old:
+            self.close_file()
+            self.open_file()
+
+    def open_file(self) -> None:
+        self.__file_number += 1
+        name = f"{self.prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{self.__file_number:04d}"
+        path = os.path.join(self.directory, name + ".bin")
+        self.__data_file = open(path, "wb", buffering=1 << 20)
+        if self.index:
+            self.__index_file = open(os.path.join(self.directory, name + ".idx"), "wb", buffering=1 << 16)
+        self.__file_bytes = 0
+        self.__file_opened_at = time.monotonic()
+        self.files.append(path)
+
+    def close_file(self) -> None:
+        if self.__data_file:
+            self.__data_file.close()
+            self.__data_file = None
+        if self.__index_file:
+            self.__index_file.close()
+            self.__index_file = None
+
+    @classmethod
+    def read_index(cls, path: str) -> list[tuple[float, int, int]]:
+        """Decode a ".idx" file into (timestamp, offset, length) records"""
+        with open(path, "rb") as file:
+            return list(cls.INDEX_RECORD.iter_unpack(file.read()))
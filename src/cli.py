@@ -0,0 +1,139 @@
+from src.ports_core import PortsCore, PortException
+import argparse
+import threading
+import time
+import sys
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.main", description="COM Port Terminal")
+    parser.add_argument("--headless", action="store_true", help="run without GUI: bridge stdin to TX and RX to stdout")
+    parser.add_argument("--tx", help="TX port name (headless)")
+    parser.add_argument("--rx", help="RX port name (headless)")
+    parser.add_argument("--baudrate", type=int, default=None, help="baudrate for both ports")
+    parser.add_argument("--timeout", type=float, default=None, help="read timeout in seconds")
+    parser.add_argument("--input", help="send this file (memory-mapped) instead of stdin")
+    parser.add_argument("--capture-dir", help="record RX to rotating files in this directory instead of stdout")
+    parser.add_argument("--capture-max-bytes", type=int, default=256 << 20, help="rotate capture files at this size")
+    parser.add_argument("--framing", choices=["cobs", "length"], help="frame each stdin read with a CRC (default: raw stream)")
+    parser.add_argument("--crc", choices=["crc16", "crc32"], default="crc16", help="frame checksum")
+    parser.add_argument("--compression", choices=["zlib", "lzma"], help="compress each frame (turns on --framing cobs unless set)")
+    parser.add_argument("--compression-level", type=int, default=6)
+    parser.add_argument("--compression-min-size", type=int, help="send shorter messages raw (default: 0 with a dictionary, else 32)")
+    parser.add_argument("--compression-dict", help="file with a shared zlib dictionary of typical messages")
+    parser.add_argument("--keep-open", action="store_true", help="keep receiving after input ends (until Ctrl+C)")
+    parser.add_argument("--stats-interval", type=float, default=5.0, help="seconds between throughput lines on stderr (0 - off)")
+    return parser
+
+
+class HeadlessBridge:
+    """stdin -> TX, RX -> stdout (or capture files), with periodic throughput stats on stderr."""
+    READ_SIZE = 1 << 16
+
+    def __init__(self, core: PortsCore, args: argparse.Namespace):
+        self.core: PortsCore = core
+        self.args: argparse.Namespace = args
+        self.tx_bytes: int = 0
+        self.rx_bytes: int = 0
+        self.is_running: bool = False
+        self.__output = None
+
+    def open(self) -> None:
+        self.core.set_ports_params(baudrate=self.args.baudrate, timeout=self.args.timeout)
+        self.core.framing = self.args.framing or ("cobs" if self.args.compression else None)  # Compression needs frames
+        self.core.frame_crc = self.args.crc
+        self.core.compression = self.args.compression
+        self.core.compression_level = self.args.compression_level
+        self.core.compression_min_size = self.args.compression_min_size
+        if self.args.compression_dict:
+            with open(self.args.compression_dict, "rb") as file:
+                self.core.compression_dict = file.read()
+        self.core.set_port(self.core.create_port(self.args.tx), 1)
+        self.core.set_port(self.core.create_port(self.args.rx), 2)
+        if self.args.capture_dir:
+            self.core.start_capture(PortsCore.RX_SLOTS[1], self.args.capture_dir, max_file_bytes=self.args.capture_max_bytes)
+        else:
+            self.__output = open(sys.stdout.fileno(), "wb", buffering=1 << 20, closefd=False)
+        self.core.emit_received = self.on_received
+        self.core.emit_receive_error = lambda name, error: print(f"Receive error on {name}: {error}", file=sys.stderr, flush=True)
+        self.core.start_receiving(1)
+        self.is_running = True
+
+    def close(self) -> None:
+        self.is_running = False
+        self.core.close_active_ports()
+        if self.__output:
+            self.__output.flush()
+
+    def on_received(self, message: bytes, bytes_count: int) -> None:
+        self.rx_bytes += bytes_count
+        if self.__output:
+            self.__output.write(message)
+
+    def send_stdin(self) -> None:
+        stdin = sys.stdin.buffer
+        read_size = min(self.READ_SIZE, self.core.max_message_size() or self.READ_SIZE)  # Every read must fit in one frame
+        while self.is_running:
+            data = stdin.read1(read_size)
+            if not data:
+                break
+            self.tx_bytes += self.core.send_message(1, data)
+
+    def send_file(self) -> None:
+        job = self.core.send_file_async(1, self.args.input)
+        while self.is_running and not job.is_done:
+            self.tx_bytes = job.sent_bytes
+            time.sleep(0.1)
+        self.tx_bytes = job.sent_bytes
+        if job.error:
+            print(f"Send error: {job.error}", file=sys.stderr)
+
+    def run(self) -> None:
+        sender = threading.Thread(target=self.send_file if self.args.input else self.send_stdin, daemon=True)
+        sender.start()
+        started_at = last_at = time.monotonic()
+        last_tx = last_rx = 0
+        try:
+            while sender.is_alive() or self.args.keep_open:
+                if sender.is_alive():
+                    sender.join(self.args.stats_interval or None)
+                else:
+                    time.sleep(self.args.stats_interval or 1.0)
+                now = time.monotonic()
+                if self.args.stats_interval and now - last_at >= self.args.stats_interval:
+                    self.print_stats(now - last_at, self.tx_bytes - last_tx, self.rx_bytes - last_rx)
+                    last_at, last_tx, last_rx = now, self.tx_bytes, self.rx_bytes
+                if self.__output:
+                    self.__output.flush()
+            self.wait_rx_idle()
+        except KeyboardInterrupt:
+            pass
+        self.print_stats(time.monotonic() - started_at, self.tx_bytes, self.rx_bytes, total=True)
+
+    def wait_rx_idle(self) -> None:
+        """Let the tail of the transfer arrive: wait until RX is quiet for one portion gap"""
+        last_rx = -1
+        while last_rx != self.rx_bytes:
+            last_rx = self.rx_bytes
+            time.sleep(self.core.portion_gap)
+
+    def print_stats(self, elapsed: float, tx_bytes: int, rx_bytes: int, total: bool = False) -> None:
+        elapsed = max(elapsed, 1e-9)
+        label = "total" if total else "stats"
+        print(f"[{label}] TX {tx_bytes} B ({tx_bytes / elapsed:.0f} B/s), RX {rx_bytes} B ({rx_bytes / elapsed:.0f} B/s)",
+              file=sys.stderr, flush=True)
+
+
+def run_headless(args: argparse.Namespace) -> int:
+    if not args.tx or not args.rx:
+        print("--headless needs --tx and --rx", file=sys.stderr)
+        return 2
+    bridge = HeadlessBridge(PortsCore(), args)
+    try:
+        bridge.open()
+        bridge.run()
+    except PortException as e:
+        print(f"Error: {e.message}", file=sys.stderr)
+        return 1
+    finally:
+        bridge.close()
+    return 0
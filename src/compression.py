@@ -0,0 +1,113 @@
+import zlib
+import lzma
+
+class CompressionException(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+METHOD_RAW = 0
+METHOD_ZLIB = 1
+METHOD_LZMA = 2
+METHODS = {"zlib": METHOD_ZLIB, "lzma": METHOD_LZMA}
+
+DEFLATE_RAW = -15  # zlib wbits for raw deflate: no zlib header/adler32 on every message
+
+
+def lzma_filters(level: int) -> list[dict]:
+    # Raw LZMA2 stream: no container headers, which would cost more than most messages save
+    return [{"id": lzma.FILTER_LZMA2, "preset": level}]
+
+
+def deflate_compressor(level: int, zdict: bytes | None):
+    if zdict:
+        return zlib.compressobj(level, zlib.DEFLATED, DEFLATE_RAW, zdict=zdict)
+    return zlib.compressobj(level, zlib.DEFLATED, DEFLATE_RAW)
+
+
+def deflate_decompressor(zdict: bytes | None):
+    return zlib.decompressobj(DEFLATE_RAW, zdict=zdict) if zdict else zlib.decompressobj(DEFLATE_RAW)
+
+
+class CompressionCounters:
+    """Raw vs on-the-wire byte counts, shared by the compressors below."""
+    def __init__(self):
+        self.raw_bytes: int = 0  # Message bytes before compression
+        self.wire_bytes: int = 0  # Bytes after compression and headers
+
+    @property
+    def gain(self) -> float:
+        """How many times fewer bytes went over the wire (1.0 - no gain)"""
+        return self.raw_bytes / self.wire_bytes if self.wire_bytes else 1.0
+
+    def counters(self) -> dict:
+        return {
+            "compression_raw_bytes": self.raw_bytes,
+            "compression_wire_bytes": self.wire_bytes,
+            "compression_gain": self.gain,
+        }
+
+
+class MessageCompressor(CompressionCounters):
+    """Per-message compression for framed links: payload = method byte + body.
+
+    Each message is compressed on its own and only sent compressed if that saves at
+    least min_gain of its size; otherwise it goes raw with a 1 byte header. A shared
+    zlib dictionary (zdict) of typical telemetry makes even short messages compress, so
+    with a zdict min_size defaults to 0 (without one, messages under 32 bytes go raw).
+    Both sides must use the same method, level (for lzma) and zdict.
+    """
+    def __init__(self, method: str = "zlib", level: int = 6, zdict: bytes | None = None,
+                 min_size: int | None = None, min_gain: float = 0.1):
+        if method not in METHODS:
+            raise CompressionException(f"Unknown compression: {method}")
+        super().__init__()
+        self.method: str = method
+        self.level: int = level
+        self.zdict: bytes | None = zdict
+        if min_size is None:
+            min_size = 0 if zdict else 32
+        self.min_size: int = min_size  # Shorter messages are never worth compressing
+        self.min_gain: float = min_gain
+        self.compressed_messages: int = 0
+        self.raw_messages: int = 0
+
+    def compress_body(self, message: bytes) -> bytes:
+        if self.method == "lzma":
+            return lzma.compress(message, format=lzma.FORMAT_RAW, filters=lzma_filters(self.level))
+        compressor = deflate_compressor(self.level, self.zdict)
+        return compressor.compress(message) + compressor.flush()
+
+    def decompress_body(self, method: int, body: bytes) -> bytes:
+        if method == METHOD_LZMA:
+            return lzma.decompress(body, format=lzma.FORMAT_RAW, filters=lzma_filters(self.level))
+        if method != METHOD_ZLIB:
+            raise CompressionException(f"Unknown compression method byte: {method}")
+        decompressor = deflate_decompressor(self.zdict)
+        return decompressor.decompress(body) + decompressor.flush()
+
+    def compress(self, message: bytes) -> bytes:
+        payload = None
+        if len(message) >= self.min_size:
+            body = self.compress_body(message)
+            if len(body) + 1 <= len(message) * (1 - self.min_gain):
+                payload = bytes([METHODS[self.method]]) + body
+                self.compressed_messages += 1
+        if payload is None:
+            payload = bytes([METHOD_RAW]) + message
+            self.raw_messages += 1
+        self.raw_bytes += len(message)
+        self.wire_bytes += len(payload)
+        return payload
+
+    def decompress(self, payload: bytes) -> bytes:
+        if not payload:
+            raise CompressionException("Empty payload")
+        method, body = payload[0], payload[1:]
+        try:
+            message = body if method == METHOD_RAW else self.decompress_body(method, body)
+        except (zlib.error, lzma.LZMAError) as e:
+            raise CompressionException(f"Cannot decompress: {e}")
+        self.raw_bytes += len(message)
+        self.wire_bytes += len(payload)
+        return message
@@ -0,0 +1,206 @@
+from binascii import crc_hqx
+from zlib import crc32
+import struct
+
+class FramingException(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+# Checksums are computed by C code (binascii/zlib table-driven CRCs) over whole frames
+CRC_FUNCTIONS = {
+    "crc16": (2, lambda data: crc_hqx(data, 0xFFFF).to_bytes(2, "little")),  # CRC-16/CCITT-FALSE
+    "crc32": (4, lambda data: crc32(data).to_bytes(4, "little")),
+}
+
+
+def cobs_encode_into(out: bytearray, data: bytes) -> None:
+    """Append the COBS encoding of data to out (block-wise: split on zeros, not a per-byte loop)"""
+    for segment in data.split(b"\0"):
+        while len(segment) >= 254:
+            out.append(0xFF)
+            out += segment[:254]
+            segment = segment[254:]
+        out.append(len(segment) + 1)
+        out += segment
+
+
+def cobs_decode(data: bytes | memoryview) -> bytes | None:
+    """Decode one COBS block (without the 0 delimiter); None if it is malformed"""
+    out = bytearray()
+    position = 0
+    size = len(data)
+    while position < size:
+        code = data[position]
+        end = position + code
+        if code == 0 or end > size:
+            return None
+        out += data[position + 1:end]
+        position = end
+        if code < 0xFF and position < size:
+            out.append(0)
+    return bytes(out)
+
+
+class FrameCodec:
+    """Base for framing codecs: batched encode(), incremental decode(), frame-level counters.
+
+    One instance per receiving port: decode() keeps the partial frame between calls.
+    """
+    KIND = ""
+    def __init__(self, crc: str = "crc16", max_frame_size: int = 1 << 16):
+        if crc not in CRC_FUNCTIONS:
+            raise FramingException(f"Unknown CRC: {crc}")
+        self.crc_name: str = crc
+        self.crc_size, self.crc = CRC_FUNCTIONS[crc]
+        self.max_frame_size: int = max_frame_size
+        self.frames_encoded: int = 0
+        self.frames_decoded: int = 0
+        self.crc_failures: int = 0
+        self.resyncs: int = 0  # Times garbage or a broken frame was skipped to find the next frame
+        self._buffer: bytearray = bytearray()
+
+    def encode(self, payloads: list[bytes]) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> list[bytes]:
+        raise NotImplementedError
+
+    def check(self, frame: bytes | memoryview) -> bytes | None:
+        """Strip and verify the trailing CRC; None (and a counted failure) if it does not match"""
+        if len(frame) < self.crc_size:
+            self.crc_failures += 1
+            return None
+        payload = frame[:len(frame) - self.crc_size]
+        if self.crc(payload) != bytes(frame[len(frame) - self.crc_size:]):
+            self.crc_failures += 1
+            return None
+        return bytes(payload)
+
+    def counters(self) -> dict:
+        return {
+            "frames_encoded": self.frames_encoded,
+            "frames_decoded": self.frames_decoded,
+            "crc_failures": self.crc_failures,
+            "resyncs": self.resyncs,
+        }
+
+
+class CobsCodec(FrameCodec):
+    """COBS frames: cobs(payload + crc) followed by a 0 delimiter; resync is the next 0.
+
+    Every batch also starts with a delimiter, so line noise before it ends as a bad block
+    instead of swallowing the first frame.
+    """
+    KIND = "cobs"
+    DELIMITER = b"\0"
+
+    def encode(self, payloads: list[bytes]) -> bytes:
+        out = bytearray(self.DELIMITER)
+        for payload in payloads:
+            cobs_encode_into(out, bytes(payload) + self.crc(payload))
+            out += self.DELIMITER
+        self.frames_encoded += len(payloads)
+        return bytes(out)
+
+    def decode(self, data: bytes) -> list[bytes]:
+        self._buffer += data
+        if self.DELIMITER not in data:
+            if len(self._buffer) > self.max_frame_size * 2:  # No delimiter for too long: drop and resync
+                self._buffer.clear()
+                self.resyncs += 1
+            return []
+        *blocks, rest = self._buffer.split(self.DELIMITER)
+        self._buffer = rest
+        frames = []
+        for block in blocks:
+            if not block:
+                continue  # Idle delimiters between frames
+            frame = cobs_decode(block)
+            if frame is None:
+                self.resyncs += 1
+                continue
+            payload = self.check(frame)
+            if payload is not None:
+                frames.append(payload)
+        self.frames_decoded += len(frames)
+        return frames
+
+
+class LengthPrefixCodec(FrameCodec):
+    """Length-prefixed frames: MAGIC, uint32 LE payload length, CRC-16 of those 6 bytes,
+    payload, crc(header + payload).
+
+    The header CRC is checked before waiting for the body, so a stray MAGIC in line noise
+    cannot stall the decoder on a bogus length. On a CRC failure or bad header the decoder
+    searches for the next MAGIC after the bad one.
+    """
+    KIND = "length"
+    MAGIC = b"\xA5\x5A"
+    HEADER = struct.Struct("<2sIH")
+    PREFIX_SIZE = 6  # MAGIC + length, covered by the header CRC
+
+    @staticmethod
+    def header_crc(prefix: bytes | memoryview) -> int:
+        return crc_hqx(prefix, 0xFFFF)
+
+    def encode(self, payloads: list[bytes]) -> bytes:
+        out = bytearray()
+        for payload in payloads:
+            start = len(out)
+            prefix = self.MAGIC + len(payload).to_bytes(4, "little")
+            out += self.HEADER.pack(self.MAGIC, len(payload), self.header_crc(prefix))
+            out += payload
+            with memoryview(out) as view:
+                checksum = self.crc(view[start:])
+            out += checksum
+        self.frames_encoded += len(payloads)
+        return bytes(out)
+
+    def decode(self, data: bytes) -> list[bytes]:
+        buffer = self._buffer
+        buffer += data
+        frames = []
+        position = 0
+        view = memoryview(buffer)
+        try:
+            while True:
+                start = buffer.find(self.MAGIC, position)
+                if start < 0:
+                    if len(buffer) - position > 1:
+                        self.resyncs += 1
+                    position = max(position, len(buffer) - 1)  # Last byte may be half of MAGIC
+                    break
+                if start > position:
+                    self.resyncs += 1  # Skipped garbage before the frame
+                position = start
+                if len(buffer) - start < self.HEADER.size:
+                    break
+                _, length, header_crc = self.HEADER.unpack_from(buffer, start)
+                if length > self.max_frame_size or header_crc != self.header_crc(view[start:start + self.PREFIX_SIZE]):
+                    self.resyncs += 1
+                    position = start + 1
+                    continue
+                end = start + self.HEADER.size + length + self.crc_size
+                if end > len(buffer):
+                    break
+                if self.crc(view[start:end - self.crc_size]) != bytes(view[end - self.crc_size:end]):
+                    self.crc_failures += 1
+                    position = start + 1
+                    continue
+                frames.append(bytes(view[start + self.HEADER.size:end - self.crc_size]))
+                position = end
+        finally:
+            view.release()
+        del buffer[:position]
+        self.frames_decoded += len(frames)
+        return frames
+
+
+CODECS = {codec.KIND: codec for codec in (CobsCodec, LengthPrefixCodec)}
+
+
+def make_codec(kind: str, crc: str = "crc16", max_frame_size: int = 1 << 16) -> FrameCodec:
+    if kind not in CODECS:
+        raise FramingException(f"Unknown framing: {kind}")
+    return CODECS[kind](crc=crc, max_frame_size=max_frame_size)
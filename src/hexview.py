@@ -0,0 +1,143 @@
+from bisect import bisect_left, bisect_right
+
+# Printable ASCII stays, everything else becomes "." (one translate() over the whole buffer)
+ASCII_TABLE = bytes(byte if 0x20 <= byte < 0x7F else ord(".") for byte in range(256))
+
+
+def format_rows(data: bytes | memoryview, start_offset: int, width: int = 16,
+                gaps: list[tuple[int, int]] = ()) -> str:
+    """Hex + ASCII dump of data, one row per width bytes.
+
+    The hex and ASCII columns are built for the whole buffer at once (bytes.hex and
+    bytes.translate run in C); Python only slices them per row, never loops per byte.
+    Bytes in gaps ((start, end) indexes into data) were never received and show as "--".
+    """
+    data = bytes(data)
+    hex_text = data.hex(" ")
+    ascii_text = data.translate(ASCII_TABLE).decode("ascii")
+    for start, end in gaps:
+        hex_text = hex_text[:start * 3] + " ".join(["--"] * (end - start)) + hex_text[end * 3 - 1:]
+        ascii_text = ascii_text[:start] + " " * (end - start) + ascii_text[end:]
+    hex_width = width * 3 - 1
+    rows = []
+    for row_start in range(0, len(data), width):
+        hex_part = hex_text[row_start * 3:row_start * 3 + hex_width]
+        rows.append(f"{start_offset + row_start:08x}  {hex_part:<{hex_width}}  {ascii_text[row_start:row_start + width]}")
+    return "\n".join(rows)
+
+
+def parse_pattern(text: str) -> bytes:
+    """Search pattern from hex ("de ad be ef") or, if prefixed with a quote, ASCII ('"OK")"""
+    text = text.strip()
+    if text.startswith(("'", '"')):
+        return text[1:].rstrip("'\"").encode("latin-1")
+    return bytes.fromhex(text)
+
+
+class HexCapture:
+    """Received bytes for the hex view, with a search index for one pattern.
+
+    Offsets are stream offsets: they keep counting when old data is trimmed (base_offset).
+    Bytes lost before reaching the view (see skip()) keep their place as a marked gap, so
+    later offsets still match the stream.
+    The index (sorted match offsets) is built once per pattern with bytes.find and then only
+    extended over newly appended data, so next/previous match is a bisect.
+    """
+    def __init__(self, max_bytes: int = 64 << 20, width: int = 16):
+        self.max_bytes: int = max_bytes
+        self.width: int = width
+        self.data: bytearray = bytearray()
+        self.base_offset: int = 0  # Stream offset of data[0]
+        self.pattern: bytes = b""
+        self.matches: list[int] = []  # Stream offsets of pattern occurrences
+        self.gaps: list[tuple[int, int]] = []  # (start, end) stream offsets of bytes that were never received
+        self.__indexed_to: int = 0  # Stream offset up to which matches are complete
+
+    @property
+    def end_offset(self) -> int:
+        return self.base_offset + len(self.data)
+
+    @property
+    def row_count(self) -> int:
+        return (len(self.data) + self.width - 1) // self.width
+
+    def append(self, chunk: bytes, offset: int | None = None) -> None:
+        """Add received bytes; offset is their stream offset if known, a jump past the end is a gap"""
+        if offset is not None and offset > self.end_offset:
+            self.skip(offset - self.end_offset)
+        self.data += chunk
+        if len(self.data) > self.max_bytes + self.max_bytes // 8:
+            self.trim(len(self.data) - self.max_bytes)  # Trim in bulk, not on every append
+        if self.pattern:
+            self.index_tail()
+
+    def skip(self, count: int) -> None:
+        """Account for count lost bytes: they take up space (zeros) but are drawn and searched as a gap"""
+        self.gaps.append((self.end_offset, self.end_offset + count))
+        self.data += bytes(count)
+
+    def trim(self, count: int) -> None:
+        count -= count % self.width  # Keep rows aligned to width
+        del self.data[:count]
+        self.base_offset += count
+        del self.matches[:bisect_left(self.matches, self.base_offset)]
+        while self.gaps and self.gaps[0][1] <= self.base_offset:
+            self.gaps.pop(0)
+        self.__indexed_to = max(self.__indexed_to, self.base_offset)
+
+    def clear(self) -> None:
+        """Drop everything and restart offsets from 0 (the search pattern is kept)"""
+        self.data = bytearray()
+        self.base_offset = 0
+        self.matches = []
+        self.gaps = []
+        self.__indexed_to = 0
+
+    def rows(self, first_row: int, count: int) -> str:
+        start = first_row * self.width
+        end = start + count * self.width
+        first = self.base_offset + start
+        gaps = [(max(gap_start, first) - first, min(gap_end, self.base_offset + end) - first)
+                for gap_start, gap_end in self.gaps if gap_start < self.base_offset + end and gap_end > first]
+        with memoryview(self.data) as view:
+            return format_rows(view[start:end], first, self.width, gaps)
+
+    def in_gap(self, offset: int, length: int) -> bool:
+        """Whether any of length bytes from stream offset fall into a gap"""
+        index = bisect_right(self.gaps, (offset + length, ))
+        return index > 0 and self.gaps[index - 1][1] > offset
+
+    def row_of(self, offset: int) -> int:
+        """Row (relative to the kept data) that holds stream offset"""
+        return max(0, min(offset - self.base_offset, len(self.data) - 1)) // self.width
+
+    def set_pattern(self, pattern: bytes) -> int:
+        self.pattern = pattern
+        self.matches = []
+        self.__indexed_to = self.base_offset
+        if pattern:
+            self.index_tail()
+        return len(self.matches)
+
+    def index_tail(self) -> None:
+        # Restart len(pattern) - 1 bytes back so matches across the previous end are found
+        position = max(0, self.__indexed_to - self.base_offset - len(self.pattern) + 1)
+        if self.matches:
+            position = max(position, self.matches[-1] - self.base_offset + 1)
+        find = self.data.find
+        while True:
+            position = find(self.pattern, position)
+            if position < 0:
+                break
+            if not self.gaps or not self.in_gap(self.base_offset + position, len(self.pattern)):
+                self.matches.append(self.base_offset + position)
+            position += 1
+        self.__indexed_to = self.end_offset
+
+    def next_match(self, offset: int) -> int | None:
+        index = bisect_right(self.matches, offset)
+        return self.matches[index] if index < len(self.matches) else None
+
+    def previous_match(self, offset: int) -> int | None:
+        index = bisect_left(self.matches, offset)
+        return self.matches[index - 1] if index > 0 else None
@@ -0,0 +1,55 @@
+from serial.tools.list_ports import comports
+import threading
+
+class PortInventory:
+    """Cached list of available ports, refreshed by a background thread.
+
+    comports() can take a noticeable time (especially on Windows), so it never runs on
+    the caller's thread: ports() returns the last snapshot, and on_change(added, removed)
+    is called from the watcher thread whenever a refresh differs from it.
+    """
+    def __init__(self, interval: float = 1.0):
+        self.interval: float = interval
+        self.is_running: bool = False
+        self.__ports: tuple[str, ...] = ()
+        self.__stopped = threading.Event()
+        self.__thread: threading.Thread | None = None
+
+    def ports(self) -> list[str]:
+        return list(self.__ports)
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self.is_running = True
+        self.__stopped.clear()
+        self.__thread = threading.Thread(target=self.watch_thread_body, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        if not self.is_running:
+            return
+        self.is_running = False
+        self.__stopped.set()
+        self.__thread.join()
+        self.__thread = None
+
+    def refresh(self) -> None:
+        current = tuple(sorted(port.name for port in comports()))
+        if current == self.__ports:
+            return
+        old = set(self.__ports)
+        new = set(current)
+        self.__ports = current  # Swap the whole tuple: readers never see a half-built list
+        self.on_change(sorted(new - old), sorted(old - new))
+
+    def watch_thread_body(self) -> None:
+        while self.is_running:
+            try:
+                self.refresh()
+            except Exception:
+                pass  # Enumeration can fail transiently while a device is being plugged in
+            self.__stopped.wait(self.interval)
+
+    def on_change(self, added: list[str], removed: list[str]) -> None:
+        pass
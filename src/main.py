@@ -1,7 +1,11 @@
-from src.app import App
-import logging
-import serial
+from src.cli import build_parser, run_headless
+import sys
 
 if __name__ == "__main__":
+    args = build_parser().parse_args()
+    if args.headless:
+        sys.exit(run_headless(args))
+
+    from src.app import App  # Tk is only imported when the GUI is requested
     app = App()
-    app.start()
\ No newline at end of file
+    app.start()
@@ -1,90 +1,897 @@
 from serial.tools.list_ports import comports
 from serial.serialutil import SerialException
-import tkinter as tk
+from collections import deque
+from src.capture import CaptureRecorder
+from src.stats import PortStats
+from src.inventory import PortInventory
+from src.framing import FrameCodec, FramingException, make_codec
+from src.compression import MessageCompressor, CompressionException
+import selectors
+import mmap
+import os
 import threading
+import socket
 import serial
+import queue
+import time
+import re
 
 class PortException(Exception):
     def __init__(self, message):
         self.message = message
 
+class Portion:
+    """A complete received portion: bytes between two inter-byte idle gaps."""
+    def __init__(self, data: bytes, chunk_count: int, started_at: float, ended_at: float):
+        self.data: bytes = data
+        self.byte_count: int = len(data)
+        self.chunk_count: int = chunk_count
+        self.started_at: float = started_at  # time.monotonic() of the first chunk
+        self.ended_at: float = ended_at  # time.monotonic() of the last chunk
+        self.offset: int | None = None  # Stream offset of data[0], set by consumers that number the stream
+
+    @property
+    def duration(self) -> float:
+        return self.ended_at - self.started_at
+
+    def __len__(self) -> int:
+        return self.byte_count
+
+
+class PortionFramer:
+    """Splits the received stream into portions by inter-byte idle gaps (monotonic timestamps).
+
+    Under continuous traffic there is no gap, so a portion is also closed once it is
+    max_portion_duration old or max_portion_size long.
+    Data is accumulated in a bytearray, so appending is O(len(chunk)), not O(portion size).
+    """
+    def __init__(self, gap: float = 0.1, max_portion_size: int = 1 << 20, max_portion_duration: float = 0.2):
+        self.gap: float = gap  # Idle seconds that end a portion
+        self.max_portion_size: int = max_portion_size  # Force a portion out when it grows this big
+        self.max_portion_duration: float = max_portion_duration  # ...or when its first chunk is this old
+        self.__buffer: bytearray = bytearray()
+        self.__chunk_count: int = 0
+        self.__started_at: float = 0.0
+        self.__last_at: float = 0.0
+
+    def feed(self, data: bytes, now: float | None = None) -> Portion | None:
+        """Add a chunk; returns the previous portion if the gap before this chunk closed it."""
+        now = time.monotonic() if now is None else now
+        finished = self.poll(now)
+        if not self.__buffer:
+            self.__started_at = now
+        self.__buffer += data
+        self.__chunk_count += 1
+        self.__last_at = now
+        if finished is None and (len(self.__buffer) >= self.max_portion_size
+                                 or now - self.__started_at >= self.max_portion_duration):
+            finished = self.flush()
+        return finished
+
+    def poll(self, now: float | None = None) -> Portion | None:
+        """Return the pending portion if the line has been idle for at least gap or it is too old."""
+        now = time.monotonic() if now is None else now
+        if self.__buffer and (now - self.__last_at >= self.gap or now - self.__started_at >= self.max_portion_duration):
+            return self.flush()
+        return None
+
+    def flush(self) -> Portion | None:
+        """Close the pending portion regardless of timing."""
+        if not self.__buffer:
+            return None
+        portion = Portion(bytes(self.__buffer), self.__chunk_count, self.__started_at, self.__last_at)
+        self.__buffer = bytearray()
+        self.__chunk_count = 0
+        return portion
+
+
+class ReceiveBuffer:
+    """Bounded single-producer/single-consumer handoff between the receiver thread and the UI.
+
+    The reader thread only calls push(), the UI tick only calls drain(). deque append/popleft
+    are atomic, and every counter is written by one side only, so no lock is needed.
+    Items are anything with len() in bytes (raw chunks, Portion objects).
+    """
+    DROP_OLDEST = "drop_oldest"  # Keep the freshest data when the UI falls behind
+    DROP_NEWEST = "drop_newest"  # Keep what is already queued, reject new chunks
+
+    def __init__(self, max_bytes: int = 1 << 20, drop_policy: str = DROP_OLDEST):
+        if drop_policy not in (self.DROP_OLDEST, self.DROP_NEWEST):
+            raise PortException(f"Unknown drop policy: {drop_policy}")
+        self.max_bytes: int = max_bytes
+        self.drop_policy: str = drop_policy
+        self.__items: deque = deque()
+
+        self.pushed_bytes: int = 0  # Written by producer only
+        self.dropped_bytes: int = 0  # Written by producer only
+        self.drained_bytes: int = 0  # Written by consumer only
+
+    def pending_bytes(self) -> int:
+        return self.pushed_bytes - self.dropped_bytes - self.drained_bytes
+
+    def push(self, item) -> bool:
+        """Queue an item, applying the drop policy if the buffer is full. Returns False if it was dropped."""
+        size = len(item)
+        if self.pending_bytes() + size > self.max_bytes:
+            if self.drop_policy == self.DROP_NEWEST:
+                self.pushed_bytes += size
+                self.dropped_bytes += size
+                return False
+            while self.__items and self.pending_bytes() + size > self.max_bytes:
+                try:
+                    self.dropped_bytes += len(self.__items.popleft())
+                except IndexError:  # Consumer drained it first
+                    break
+        self.__items.append(item)
+        self.pushed_bytes += size
+        return True
+
+    def drain(self) -> list:
+        """Take everything queued so far as one batch."""
+        items = []
+        while True:
+            try:
+                items.append(self.__items.popleft())
+            except IndexError:
+                break
+        self.drained_bytes += sum(len(item) for item in items)
+        return items
+
+    def clear(self) -> None:
+        self.drain()
+
+
+class SendJob:
+    """One queued message and its write progress (updated by the writer thread).
+
+    total_bytes/sent_bytes count what goes on the wire; payload_bytes is the caller's
+    message before framing and compression, the size to report to the user.
+    """
+    def __init__(self, message: bytes | memoryview, payload_bytes: int | None = None):
+        self.message: bytes | memoryview = message
+        self.total_bytes: int = len(message)
+        self.payload_bytes: int = len(message) if payload_bytes is None else payload_bytes
+        self.sent_bytes: int = 0
+        self.is_done: bool = False
+        self.is_cancelled: bool = False
+        self.error: str | None = None
+        self.queued_at: float = time.monotonic()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.encode = None  # (piece: bytes) -> wire bytes, set when each slice must go out as a frame
+        self.__resumed = threading.Event()
+        self.__resumed.set()
+
+    @property
+    def is_paused(self) -> bool:
+        return not self.__resumed.is_set()
+
+    def pause(self) -> None:
+        self.__resumed.clear()
+
+    def resume(self) -> None:
+        self.__resumed.set()
+
+    def cancel(self) -> None:
+        self.is_cancelled = True
+        self.__resumed.set()  # Wake a paused writer so it sees the cancel
+
+    def wait_if_paused(self, timeout: float) -> bool:
+        """Block the writer while paused; returns False if still paused after timeout"""
+        return self.__resumed.wait(timeout)
+
+    @property
+    def payload_sent_bytes(self) -> int:
+        """Share of payload_bytes covered by the bytes written so far"""
+        if self.sent_bytes >= self.total_bytes:
+            return self.payload_bytes
+        return self.payload_bytes * self.sent_bytes // self.total_bytes
+
+    @property
+    def percent(self) -> float:
+        return 100.0 * self.sent_bytes / self.total_bytes if self.total_bytes else 100.0
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second since the first write"""
+        if self.started_at is None:
+            return 0.0
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return self.sent_bytes / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        """Seconds left at the current throughput, None until it is known"""
+        rate = self.throughput
+        return (self.total_bytes - self.sent_bytes) / rate if rate else None
+
+    def release(self) -> None:
+        """Free the payload once the writer is done with it"""
+        pass
+
+
+class FileSendJob(SendJob):
+    """Send job over a memory-mapped file: the writer slices the mapping, nothing is read into RAM."""
+    def __init__(self, path: str):
+        self.path: str = path
+        self.__file = open(path, "rb")
+        self.__mmap: mmap.mmap | None = None
+        try:
+            size = os.fstat(self.__file.fileno()).st_size
+            if size:
+                self.__mmap = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            self.__file.close()
+            raise
+        super().__init__(memoryview(self.__mmap) if self.__mmap else memoryview(b""))
+
+    def release(self) -> None:
+        self.message.release()
+        if self.__mmap:
+            self.__mmap.close()
+        self.__file.close()
+
+
+class PortWriter:
+    """Dedicated writer thread for one TX port.
+
+    Messages are written in chunk_size slices; before each slice the thread waits until
+    the OS output buffer (out_waiting) drops below high_water, so write() never blocks long.
+    """
+    def __init__(self, port: serial.Serial, chunk_size: int = 256, high_water: int = 1024, stats: PortStats | None = None):
+        self.port: serial.Serial = port
+        self.stats: PortStats = stats or PortStats(port.name)
+        self.chunk_size: int = chunk_size
+        self.high_water: int = high_water
+        self.is_running: bool = False
+        self.__queue: queue.Queue[SendJob | None] = queue.Queue()
+        self.__thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self.is_running = True
+        self.__thread = threading.Thread(target=self.writer_thread_body, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.is_running = False
+        self.__queue.put(None)
+        _cancel_io(self.port, read=False, write=True)  # Don't wait for a chunk still going out
+        if self.__thread:
+            self.__thread.join()
+            self.__thread = None
+
+    def submit(self, message: bytes, payload_bytes: int | None = None) -> SendJob:
+        return self.submit_job(SendJob(message, payload_bytes))
+
+    def submit_job(self, job: SendJob) -> SendJob:
+        self.__queue.put(job)
+        return job
+
+    def pending_jobs(self) -> int:
+        return self.__queue.qsize()
+
+    def wait_for_room(self) -> None:
+        # Time to drain one chunk at 10 bits per byte, so we poll about as often as room appears
+        chunk_time = self.chunk_size * 10 / max(self.port.baudrate, 1)
+        while self.is_running and self.port.is_open and self.port.out_waiting > self.high_water:
+            time.sleep(min(chunk_time, 0.05))
+
+    def writer_thread_body(self) -> None:
+        while True:
+            job = self.__queue.get()
+            if job is None:
+                break
+            view = memoryview(job.message)
+            try:
+                job.started_at = time.monotonic()
+                while job.sent_bytes < job.total_bytes and self.is_running and not job.is_cancelled:
+                    if not job.wait_if_paused(0.1):
+                        continue
+                    self.wait_for_room()
+                    with view[job.sent_bytes:job.sent_bytes + self.chunk_size] as piece:  # Slice without copying
+                        if job.encode:
+                            wire = job.encode(bytes(piece))  # Whole slice becomes one frame
+                            self.port.write(wire)
+                            written, wire_bytes = len(piece), len(wire)
+                        else:
+                            written = self.port.write(piece)
+                            written = written if written is not None else len(piece)
+                            wire_bytes = written
+                    job.sent_bytes += written
+                    self.stats.record_write(wire_bytes, time.monotonic())
+                    self.on_progress(job)
+                if job.sent_bytes < job.total_bytes:
+                    job.error = "Cancelled"
+            except Exception as e:
+                job.error = str(e)
+            finally:
+                view.release()
+            job.finished_at = time.monotonic()
+            job.release()
+            job.is_done = True
+            self.on_complete(job)
+
+    def on_progress(self, job: SendJob) -> None:
+        pass
+
+    def on_complete(self, job: SendJob) -> None:
+        pass
+
+
+class PortReceiver:
+    """Receive state of one port: frames incoming chunks and hands them to the port's callbacks."""
+    def __init__(self, name: str, port: serial.Serial, framer: PortionFramer, on_data, on_portion, stats: PortStats | None = None):
+        self.name: str = name
+        self.port: serial.Serial = port
+        self.stats: PortStats = stats or PortStats(name)
+        self.framer: PortionFramer = framer
+        self.on_data = on_data  # (data: bytes, bytes_count: int) -> None
+        self.on_portion = on_portion  # (portion: Portion) -> None
+        self.is_active: bool = True
+        self.thread: threading.Thread | None = None  # Only for ports the reactor cannot select on
+        self.fd: int | None = None  # File descriptor while registered in the reactor
+        self.capture: CaptureRecorder | None = None  # Disk sink fed straight from the read path
+        self.codec: FrameCodec | None = None  # Set when framing is on: frames replace gap-based portions
+        self.decompressor: MessageCompressor | None = None  # Set when compression is on (always with a codec)
+
+    def handle(self, data: bytes, now: float) -> None:
+        """Feed a chunk (or b"" on an idle tick) and emit a portion if one was closed."""
+        if data:
+            self.stats.record_read(len(data), now)
+            if self.capture:
+                self.capture.write(data)  # Raw wire bytes
+            if self.codec:
+                for frame in self.codec.decode(data):
+                    if self.decompressor:
+                        try:
+                            frame = self.decompressor.decompress(frame)
+                        except CompressionException:
+                            self.stats.decompress_errors += 1
+                            continue
+                    self.on_data(frame, len(frame))
+                    self.stats.portions += 1
+                    self.on_portion(Portion(frame, 1, now, now))
+                return
+            self.on_data(data, len(data))
+            portion = self.framer.feed(data, now)
+        else:
+            portion = self.framer.poll(now)  # Portion end is an idle gap, not a count of empty reads
+        if portion:
+            self.stats.portions += 1
+            self.on_portion(portion)
+
+    def finish(self) -> None:
+        portion = self.framer.flush()
+        if portion:
+            self.stats.portions += 1
+            self.on_portion(portion)
+
+
+class PortReactor:
+    """One thread that multiplexes reads of all registered ports through selectors (epoll on Linux).
+
+    Readable ports are drained with a single read of in_waiting bytes; every receiver also
+    gets an idle tick each loop so portion gaps are detected without traffic.
+    """
+    def __init__(self, max_chunk_size: int = 4096, tick: float = 0.02):
+        self.max_chunk_size: int = max_chunk_size
+        self.tick: float = tick  # Max seconds select() waits, bounds portion-gap detection latency
+        self.is_running: bool = False
+        self.__selector = selectors.DefaultSelector()
+        self.__receivers: dict[str, PortReceiver] = {}
+        self.__commands: queue.Queue = queue.Queue()  # Register/unregister requests for the reactor thread
+        self.__wake_reader, self.__wake_writer = socket.socketpair()
+        self.__wake_reader.setblocking(False)
+        self.__selector.register(self.__wake_reader, selectors.EVENT_READ, None)
+        self.__thread: threading.Thread | None = None
+
+    @staticmethod
+    def can_select(port: serial.Serial) -> bool:
+        try:
+            return port.fileno() is not None
+        except Exception:  # Windows ports and URL handlers (loop://) have no file descriptor
+            return False
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self.is_running = True
+        self.__thread = threading.Thread(target=self.reactor_thread_body, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        if not self.is_running:
+            return
+        self.is_running = False
+        self.wake()
+        self.__thread.join()
+        self.__thread = None
+
+    def close(self) -> None:
+        """Stop the thread and release the selector and wake sockets; the reactor cannot be restarted"""
+        self.stop()
+        self.__selector.close()
+        self.__wake_reader.close()
+        self.__wake_writer.close()
+
+    def wake(self) -> None:
+        try:
+            self.__wake_writer.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def register(self, receiver: PortReceiver) -> None:
+        self.send_command("register", receiver)
+
+    def unregister(self, name: str) -> None:
+        """Remove a port; returns once the reactor thread no longer touches it"""
+        self.send_command("unregister", name)
+
+    def send_command(self, command: str, arg) -> None:
+        done = threading.Event()
+        self.__commands.put((command, arg, done))
+        if threading.current_thread() is self.__thread:
+            self.apply_commands()
+        elif self.is_running:
+            self.wake()
+            done.wait(1.0)
+
+    def apply_commands(self) -> None:
+        while True:
+            try:
+                command, arg, done = self.__commands.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                if command == "register":
+                    self.drop(arg.name)
+                    self.add(arg)
+                else:
+                    self.drop(arg)
+            finally:
+                done.set()
+
+    def add(self, receiver: PortReceiver) -> None:
+        try:
+            receiver.fd = receiver.port.fileno()
+            self.__selector.register(receiver.fd, selectors.EVENT_READ, receiver)
+        except (SerialException, OSError, ValueError, KeyError) as e:  # Closed port, duplicate fd
+            receiver.fd = None
+            receiver.is_active = False
+            self.on_port_lost(receiver, e)
+            return
+        self.__receivers[receiver.name] = receiver
+
+    def drop(self, name: str) -> None:
+        receiver = self.__receivers.pop(name, None)
+        if receiver is None:
+            return
+        try:
+            self.__selector.unregister(receiver.fd)
+        except (KeyError, ValueError):
+            pass
+        receiver.fd = None
+        receiver.is_active = False
+        try:
+            receiver.finish()
+        except Exception as e:
+            _report_callback_error(e)
+
+    def lose(self, receiver: PortReceiver, error: Exception) -> None:
+        """Drop a port whose reads failed and report it, the other ports keep running"""
+        self.drop(receiver.name)
+        self.on_port_lost(receiver, error)
+
+    def on_port_lost(self, receiver: PortReceiver, error: Exception) -> None:
+        """Called from the reactor thread when a port is dropped because it cannot be read"""
+        pass
+
+    def reactor_thread_body(self) -> None:
+        while self.is_running:
+            self.apply_commands()
+            for key, _ in self.__selector.select(self.tick):
+                if key.data is None:
+                    try:
+                        while self.__wake_reader.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                    continue
+                receiver: PortReceiver = key.data
+                try:
+                    waiting = receiver.port.in_waiting
+                    if not waiting:  # Readable with nothing to read: device hung up
+                        self.lose(receiver, PortException(f"Port {receiver.name} hung up"))
+                        continue
+                    data = receiver.port.read(min(waiting, self.max_chunk_size))
+                except (SerialException, OSError) as e:
+                    self.lose(receiver, e)
+                    continue
+                try:
+                    receiver.handle(data, time.monotonic())
+                except Exception as e:  # A failing callback is reported, the port keeps receiving
+                    _report_callback_error(e)
+            now = time.monotonic()
+            for receiver in list(self.__receivers.values()):
+                try:
+                    receiver.handle(b"", now)
+                except Exception as e:
+                    _report_callback_error(e)
+        self.apply_commands()
+        for name in list(self.__receivers):
+            self.drop(name)
+
+
+def _report_callback_error(error: Exception) -> None:
+    """Show an exception raised by a receive callback like an uncaught thread exception, without
+    stopping the thread that delivers data for every port"""
+    threading.excepthook(threading.ExceptHookArgs([type(error), error, error.__traceback__, threading.current_thread()]))
+
+
+def _cancel_io(port: serial.Serial, read: bool = True, write: bool = False) -> None:
+    """Wake a thread blocked in port.read()/write() right away (pyserial cancel_read/cancel_write)"""
+    try:
+        if read:
+            port.cancel_read()
+        if write:
+            port.cancel_write()
+    except (AttributeError, NotImplementedError, SerialException, OSError):
+        pass  # Backend without cancel support: the thread wakes up on its own timeout
+
+
+def _slot_property(name: str) -> property:
+    """Legacy port1_1..port2_2 attribute backed by the PortsCore port registry"""
+    def getter(self) -> serial.Serial | None:
+        return self.ports.get(name)
+
+    def setter(self, port: serial.Serial | None) -> None:
+        if port is None:
+            self.ports.pop(name, None)
+        else:
+            self.ports[name] = port
+
+    return property(getter, setter)
+
+
 class PortsCore:
+    SLOT_NAMES = {1: "port1_1", 2: "port1_2", 3: "port2_1", 4: "port2_2"}  # Legacy set_port numbers
+    RX_SLOTS = {1: "port1_2", 2: "port2_1"}  # Receiving port of each device
+    TX_SLOTS = {1: "port1_1", 2: "port2_2"}  # Sending port of each device
+
+    port1_1 = _slot_property("port1_1")
+    port1_2 = _slot_property("port1_2")
+    port2_1 = _slot_property("port2_1")
+    port2_2 = _slot_property("port2_2")
+
     def __init__(self):
-        # Current ports
-        self.port1_1: serial.Serial | None = None
-        self.port1_2: serial.Serial | None = None
-        self.port2_1: serial.Serial | None = None
-        self.port2_2: serial.Serial | None = None
+        # Port registry: any number of named ports (port1_1..port2_2 are legacy names in it)
+        self.ports: dict[str, serial.Serial] = {}
 
         # Ports parameters
         self.baudrate: int = 1000
         self.timeout: float = 1.0
 
         # Attrs for receiving ports
-        self.receiving_thread: threading.Thread | None = None
+        self.receivers: dict[str, PortReceiver] = {}  # Ports currently receiving, by name
+        self.reactor: PortReactor | None = None  # Created on first use
+        self.use_reactor: bool = True  # False - one thread per port, as before
         self.is_receiving: bool = False
+        self.stats: dict[str, PortStats] = {}  # Counters by port name, kept across reopen
+        self.captures: dict[str, CaptureRecorder] = {}  # Receive-to-disk recorders by port name
+        self.read_mode: str = "chunk"  # "chunk" - bulk read of in_waiting, "byte" - old read(1) loop (fallback)
+        self.max_chunk_size: int = 4096  # Max bytes emitted in one chunk
+        self.max_chunk_latency: float = 0.05  # Max seconds to keep collecting a chunk under continuous traffic
+        self.portion_gap: float = 0.1  # Idle seconds between bytes that end a portion
+        self.max_portion_size: int = 1 << 20  # Portions longer than this are split
+        self.max_portion_duration: float = 0.2  # Continuous traffic is still shown at least this often
+
+        # Attrs for sending ports
+        self.writers: dict[str, PortWriter] = {}  # Writer thread per TX port name
+        self.write_chunk_size: int = 256  # Bytes per write() call
+        self.write_high_water: int = 1024  # Wait while out_waiting is above this
+
+        # Port enumeration
+        self.inventory: PortInventory | None = None  # Background hotplug watcher, see start_port_watch
+
+        # Framing between send_message and emit_received
+        self.framing: str | None = None  # None - raw stream, "cobs" or "length" (see src/framing.py)
+        self.frame_crc: str = "crc16"  # "crc16" or "crc32"
+        self.max_frame_size: int = 1 << 16
+        self.tx_codecs: dict[str, FrameCodec] = {}  # Encoder (and its counters) per TX port name
+
+        # Optional payload compression (applied before framing)
+        self.compression: str | None = None  # None, "zlib" or "lzma"; needs framing
+        self.compression_level: int = 6
+        self.compression_dict: bytes | None = None  # Shared zlib dictionary of typical messages, same on both ends
+        self.compression_min_size: int | None = None  # Shorter messages go raw; None - 0 with a dictionary, else 32
+        self.tx_compressors: dict[str, tuple[tuple, MessageCompressor]] = {}  # Name -> (settings, compressor)
 
         # Other params
         self.MESSAGE_END_CHAR = b"\0" ### Comment out or remove for raw (we remove in send)
 
+    def get_tx_port(self, chosen_device: int) -> serial.Serial:
+        port = self.ports.get(self.TX_SLOTS.get(chosen_device, ""))
+        if port and port.is_open:
+            return port
+        raise PortException("Invalid device number or port is not open")
+
     def send_message(self, chosen_device: int, message: bytes) -> int:
-        sent_chars_count: int = 0 # Unused — bug?
-        chosen_port: serial.Serial | None = None
+        return self.send_messages(chosen_device, [message])
 
-        if chosen_device == 1 and self.port1_1 and self.port1_1.is_open:
-            chosen_port = self.port1_1
-        elif chosen_device == 2 and self.port2_2 and self.port2_2.is_open:
-            chosen_port = self.port2_2
-        else:
-            raise PortException("Invalid device number or port is not open")
+    def send_messages(self, chosen_device: int, messages: list[bytes]) -> int:
+        """Write several messages with one write(); with framing on each becomes one frame"""
+        chosen_port = self.get_tx_port(chosen_device)
+        wire = self.encode_messages(chosen_device, messages)
+        chosen_port.write(wire) ### FIX: Remove + self.MESSAGE_END_CHAR for raw stream (req #4)
+        self.port_stats(self.TX_SLOTS[chosen_device]).record_write(len(wire), time.monotonic())
 
-        chosen_port.write(message) ### FIX: Remove + self.MESSAGE_END_CHAR for raw stream (req #4)
+        return sum(len(message) for message in messages)
 
-        return len(message)
+    def send_message_async(self, chosen_device: int, message: bytes) -> SendJob:
+        """Queue message on the TX port's writer thread; returns a SendJob to track progress"""
+        return self.get_writer(chosen_device).submit(self.encode_messages(chosen_device, [message]), len(message))
 
+    def make_codec(self) -> FrameCodec | None:
+        if not self.framing:
+            return None
+        try:
+            return make_codec(self.framing, crc=self.frame_crc, max_frame_size=self.max_frame_size)
+        except FramingException as e:
+            raise PortException(e.message)
 
-    def start_receiving(self, chosen_device: int) -> None: # , listener: callable
-        def receive_thread_body(port: serial.Serial) -> None:
-            message: bytes = b""
-            received_chars_count: int = 0
-            count_of_empty_chars: int = 0
+    def compression_settings(self) -> tuple:
+        return (self.compression, self.compression_level, self.compression_dict, self.compression_min_size)
 
-            while self.is_receiving and port and port.is_open:
-                try:
-                    byte = port.read(1)
-                    if self.is_receiving and byte != b'':
-                        received_chars_count += 1  ### NEW: Increment portion
-                        self.emit_received(byte, 1)  ### FIX: Emit single byte, not cumulative message (for real-time, portion per byte)
-                        count_of_empty_chars = 0  ### NEW: Reset empty on data
-                    else:  ### FIX: Handle empty for portion end (uncommented logic)
-                        count_of_empty_chars += 1
-                        if count_of_empty_chars > 5:  ### NEW: Pause >5 empty = end portion, reset count (for req #6 bytes in portion)
-                            received_chars_count = 0  ### NEW: Reset portion count (App will use this via emit or add self.portion_bytes)
-                            count_of_empty_chars = 0
-                            # Optional: emit b'' for end signal, but skip for raw
-                except Exception as e:
-                    raise PortException(f"Reading exception")
+    def make_compressor(self) -> MessageCompressor | None:
+        """Per-message compressor (same object type on both ends).
 
-        chosen_port: serial.Serial | None = None
-        if chosen_device == 1:
-            chosen_port = self.port1_2
-        elif chosen_device == 2:
-            chosen_port = self.port2_1
-        else:
+        Compression needs framing: every frame is compressed on its own, so a lost or corrupted
+        frame costs only that frame and a reopened port starts from a clean state.
+        """
+        if not self.compression:
+            return None
+        if not self.framing:
+            raise PortException(f"{self.compression} compression needs framing")
+        try:
+            return MessageCompressor(self.compression, level=self.compression_level, zdict=self.compression_dict,
+                                     min_size=self.compression_min_size)
+        except CompressionException as e:
+            raise PortException(e.message)
+
+    def max_message_size(self) -> int | None:
+        """Largest message one frame can carry (None without framing): compression adds a 1 byte header"""
+        if not self.framing:
+            return None
+        return self.max_frame_size - (1 if self.compression else 0)
+
+    def encode_messages(self, chosen_device: int, messages: list[bytes]) -> bytes:
+        name = self.TX_SLOTS[chosen_device]
+        limit = self.max_message_size()
+        if limit is not None:
+            for message in messages:
+                if len(message) > limit:  # The receiver would drop the frame as oversized
+                    raise PortException(f"Message of {len(message)} bytes does not fit in one frame (max {limit})")
+        if self.compression:
+            settings, compressor = self.tx_compressors.get(name, (None, None))
+            if settings != self.compression_settings():
+                compressor = self.make_compressor()
+                self.tx_compressors[name] = (self.compression_settings(), compressor)
+                self.port_stats(name).compressor = compressor
+            messages = [compressor.compress(message) for message in messages]
+        if not self.framing:
+            return messages[0] if len(messages) == 1 else b"".join(messages)
+        codec = self.tx_codecs.get(name)
+        if codec is None or codec.KIND != self.framing or codec.crc_name != self.frame_crc:
+            codec = self.tx_codecs[name] = self.make_codec()
+            self.port_stats(name).codec = codec
+        return codec.encode(messages)
+
+    def send_file_async(self, chosen_device: int, path: str) -> FileSendJob:
+        """Stream a file from a memory mapping; the job supports pause(), resume() and cancel().
+
+        With framing (and compression) on, every write_chunk_size slice goes out as one frame,
+        so the receiver gets the file as a sequence of frames instead of discarding raw bytes.
+        """
+        writer = self.get_writer(chosen_device)
+        try:
+            job = FileSendJob(path)
+        except OSError as e:
+            raise PortException(f"Cannot open file: {e}")
+        if self.framing or self.compression:
+            job.encode = lambda piece: self.encode_messages(chosen_device, [piece])
+        return writer.submit_job(job)
+
+    def get_writer(self, chosen_device: int) -> PortWriter:
+        chosen_port = self.get_tx_port(chosen_device)
+        writer = self.writers.get(chosen_port.port)
+        if writer is None or writer.port is not chosen_port:
+            if writer:
+                writer.stop()
+            writer = PortWriter(chosen_port, chunk_size=self.write_chunk_size, high_water=self.write_high_water,
+                                stats=self.port_stats(self.TX_SLOTS[chosen_device]))
+            writer.on_progress = lambda job: self.emit_send_progress(job)
+            writer.on_complete = lambda job: self.emit_send_complete(job)
+            writer.start()
+            self.writers[chosen_port.port] = writer
+        return writer
+
+    def stop_writers(self) -> None:
+        for writer in self.writers.values():
+            writer.stop()
+        self.writers.clear()
+
+
+    def start_receiving(self, chosen_device: int) -> None: # , listener: callable
+        if chosen_device not in self.RX_SLOTS:
             raise PortException("Invalid device number")  ### FIX: Use PortException
+        self.start_port_receiving(self.RX_SLOTS[chosen_device])
 
-        self.receiving_thread = threading.Thread(target=receive_thread_body, args=(chosen_port,))
+    def start_port_receiving(self, name: str, on_data=None, on_portion=None) -> None:
+        """Start receiving on a registered port; callbacks default to emit_received/emit_portion"""
+        port = self.ports.get(name)
+        if port is None or not port.is_open:
+            raise PortException(f"Port {name} is not set or not open")
+        if name in self.receivers:
+            self.stop_port_receiving(name)
+
+        receiver = PortReceiver(
+            name, port,
+            PortionFramer(gap=self.portion_gap, max_portion_size=self.max_portion_size,
+                          max_portion_duration=self.max_portion_duration),
+            on_data or (lambda data, bytes_count: self.emit_received(data, bytes_count)),
+            on_portion or (lambda portion: self.emit_portion(portion)),
+            stats=self.port_stats(name),
+        )
+        receiver.capture = self.captures.get(name)
+        receiver.codec = receiver.stats.codec = self.make_codec()
+        receiver.decompressor = receiver.stats.compressor = self.make_compressor()
+        self.receivers[name] = receiver
         self.is_receiving = True
-        self.receiving_thread.start()
+
+        if self.use_reactor and self.read_mode == "chunk" and PortReactor.can_select(port):
+            if self.reactor is None:
+                self.reactor = PortReactor(max_chunk_size=self.max_chunk_size)
+                self.reactor.on_port_lost = lambda receiver, error: self.on_receiver_lost(receiver, error)
+            self.reactor.start()
+            self.reactor.register(receiver)
+        else:
+            port.timeout = self.receive_timeout(port.timeout)  # read() must return within a portion gap
+            receiver.thread = threading.Thread(target=self.receive_thread_body, args=(receiver,), daemon=True)
+            receiver.thread.start()
+
+    def receive_timeout(self, timeout: float | None) -> float:
+        """Read timeout for threaded receivers: capped at portion_gap, so an idle gap ends
+        the portion on time instead of after the full port timeout"""
+        return self.portion_gap if timeout is None else min(timeout, self.portion_gap)
+
+    def receive_thread_body(self, receiver: PortReceiver) -> None:
+        """Blocking reader for ports the reactor cannot select on (or in "byte" read mode)"""
+        port = receiver.port
+        while receiver.is_active and port and port.is_open:
+            try:
+                if self.read_mode == "byte":
+                    data = port.read(1)
+                else:
+                    data = self.read_chunk(port)
+            except (SerialException, OSError, TypeError, ValueError) as e:  # Type/ValueError: fd closed under a blocked read
+                if receiver.is_active:
+                    receiver.is_active = False
+                    self.on_receiver_lost(receiver, e)
+                break
+            now = time.monotonic()
+            if not data:
+                receiver.stats.record_read(0, now)
+            try:
+                receiver.handle(data if receiver.is_active else b"", now)
+            except Exception as e:  # A failing callback is reported, reading goes on
+                _report_callback_error(e)
+        try:
+            receiver.finish()
+        except Exception as e:
+            _report_callback_error(e)
+
+    def on_receiver_lost(self, receiver: PortReceiver, error: Exception) -> None:
+        """A port stopped receiving because it cannot be read (called from the receiving thread)"""
+        if self.receivers.get(receiver.name) is receiver:
+            self.receivers.pop(receiver.name, None)
+            self.is_receiving = bool(self.receivers)
+        self.emit_receive_error(receiver.name, error)
+
+    def stop_port_receiving(self, name: str) -> None:
+        receiver = self.receivers.pop(name, None)
+        if receiver is None:
+            return
+        receiver.is_active = False
+        if receiver.thread:
+            _cancel_io(receiver.port)  # Reader may be blocked in read() for up to timeout
+            receiver.thread.join()
+            receiver.thread = None
+            if receiver.port.is_open:
+                receiver.port.timeout = self.timeout  # Undo the receive_timeout() cap
+        elif self.reactor:
+            self.reactor.unregister(name)
+        self.is_receiving = bool(self.receivers)
+
+    def read_chunk(self, port: serial.Serial) -> bytes:
+        """Read everything available in one call (up to max_chunk_size).
+
+        Blocks for the first byte like read(1) (up to port timeout), then keeps
+        taking in_waiting until the chunk is full, the line goes quiet or
+        max_chunk_latency has passed.
+        """
+        waiting = port.in_waiting
+        chunk = bytearray(port.read(min(waiting, self.max_chunk_size) if waiting else 1))
+        if not chunk:
+            return b""
+
+        deadline = time.monotonic() + self.max_chunk_latency
+        while len(chunk) < self.max_chunk_size and time.monotonic() < deadline:
+            waiting = port.in_waiting
+            if not waiting:
+                break
+            chunk += port.read(min(waiting, self.max_chunk_size - len(chunk)))
+        return bytes(chunk)
+
+    def port_stats(self, name: str) -> PortStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = PortStats(name)
+        return stats
+
+    def stats_snapshot(self) -> dict[str, dict]:
+        """Point-in-time copy of every port's counters, rates and histograms"""
+        return {name: stats.snapshot() for name, stats in list(self.stats.items())}
+
+    def start_capture(self, name: str, directory: str, **options) -> CaptureRecorder:
+        """Record everything received on port name to rotating files in directory.
+
+        options are passed to CaptureRecorder (max_file_bytes, max_file_seconds, index, flush_interval...).
+        """
+        self.stop_capture(name)
+        recorder = CaptureRecorder(directory, prefix=options.pop("prefix", name), **options)
+        try:
+            recorder.start()
+        except OSError as e:
+            raise PortException(f"Cannot start capture: {e}")
+        self.captures[name] = recorder
+        if name in self.receivers:
+            self.receivers[name].capture = recorder
+        return recorder
+
+    def stop_capture(self, name: str) -> None:
+        recorder = self.captures.pop(name, None)
+        if recorder is None:
+            return
+        if name in self.receivers:
+            self.receivers[name].capture = None
+        recorder.stop()
+
+    def stop_captures(self) -> None:
+        for name in list(self.captures):
+            self.stop_capture(name)
 
     def end_receiving(self) -> None:
+        for name in list(self.receivers):
+            self.stop_port_receiving(name)
+        if self.reactor:
+            self.reactor.stop()
         self.is_receiving = False
-        self.receiving_thread.join()
-        self.receiving_thread = None
 
     def emit_received(self, message: bytes, bytes_count: int) -> None:
         pass
 
+    def emit_portion(self, portion: Portion) -> None:
+        pass
+
+    def emit_receive_error(self, name: str, error: Exception) -> None:
+        pass
+
+    def emit_send_progress(self, job: SendJob) -> None:
+        pass
+
+    def emit_send_complete(self, job: SendJob) -> None:
+        pass
+
 
     def create_port(self, port_name: str) -> serial.Serial:
         try:
@@ -100,58 +907,170 @@ class PortsCore:
             raise PortException("Port is not found or it is unavailable")
 
     def set_port(self, port: serial.Serial, port_number: int):
-        if port_number == 1:
-            if self.port1_1: self.close_port(self.port1_1)
-            self.port1_1 = port
-        elif port_number == 2:
-            if self.port1_2: self.close_port(self.port1_2)
-            self.port1_2 = port
-        elif port_number == 3:
-            if self.port2_1: self.close_port(self.port2_1)
-            self.port2_1 = port
-        elif port_number == 4:
-            if self.port2_2: self.close_port(self.port2_2)
-            self.port2_2 = port
-        else:
+        if port_number not in self.SLOT_NAMES:
             raise PortException("Invalid port number")
+        self.add_port(self.SLOT_NAMES[port_number], port)
+
+    def add_port(self, name: str, port: serial.Serial) -> None:
+        """Register port under name, closing the port previously registered there"""
+        old_port = self.ports.get(name)
+        if old_port:
+            self.stop_port_receiving(name)
+            self.close_port(old_port)
+        self.reset_tx_state(name)
+        self.ports[name] = port
+
+    def remove_port(self, name: str) -> None:
+        self.stop_port_receiving(name)
+        port = self.ports.pop(name, None)
+        if port:
+            self.close_port(port)
+        self.reset_tx_state(name)
+
+    def reset_tx_state(self, name: str | None = None) -> None:
+        """Forget the TX codec/compressor of port name (all ports if None): a new port starts clean"""
+        if name is None:
+            self.tx_codecs.clear()
+            self.tx_compressors.clear()
+        else:
+            self.tx_codecs.pop(name, None)
+            self.tx_compressors.pop(name, None)
 
     def close_port(self, port: serial.Serial) -> None:
         port.close()
 
 
     def get_available_ports(self) -> list[str]:
+        if self.inventory and self.inventory.is_running:
+            return self.inventory.ports()  # Cached, no blocking enumeration
         ports = [port.name for port in comports()]
         # print(ports)
         return ports
 
+    def start_port_watch(self, interval: float = 1.0) -> PortInventory:
+        """Refresh the port list in the background; changes go to emit_ports_changed"""
+        if self.inventory is None:
+            self.inventory = PortInventory(interval)
+            self.inventory.on_change = lambda added, removed: self.emit_ports_changed(added, removed)
+        self.inventory.start()
+        return self.inventory
+
+    def stop_port_watch(self) -> None:
+        if self.inventory:
+            self.inventory.stop()
+
+    def emit_ports_changed(self, added: list[str], removed: list[str]) -> None:
+        pass
+
+    def discover_pairs(self, candidates: list[str] | None = None, wait: float = 0.3) -> dict[str, str]:
+        """Find loopback TX->RX pairs in one pass: send a unique probe on every candidate, see where it arrives.
+
+        Candidates must not be open elsewhere (busy ports are skipped). Returns {tx_name: rx_name}.
+        """
+        candidates = candidates if candidates is not None else self.get_available_ports()
+        nonce = os.urandom(4).hex()
+        probe_pattern = re.compile(rb"\x02PROBE " + nonce.encode() + rb" (\S+)\x03")
+        received: dict[str, bytearray] = {}
+        opened: dict[str, str] = {}  # Candidate name -> registry name
+
+        try:
+            for name in candidates:
+                try:
+                    port = self.create_port(name)
+                except PortException:
+                    continue
+                opened[name] = f"probe:{name}"
+                self.add_port(opened[name], port)
+
+            for name, key in opened.items():
+                received[name] = bytearray()
+                self.start_port_receiving(key, on_data=lambda data, bytes_count, name=name: received[name].extend(data),
+                                          on_portion=lambda portion: None)
+
+            longest_probe = 0
+            for name, key in opened.items():
+                probe = f"\x02PROBE {nonce} {name}\x03".encode()
+                longest_probe = max(longest_probe, len(probe))
+                self.ports[key].write(probe)
+            time.sleep(wait + longest_probe * 10 / self.baudrate)  # Slack plus time on the wire at 10 bits per byte
+        finally:
+            for key in opened.values():
+                self.remove_port(key)
+                self.stats.pop(key, None)
+            if not self.receivers and self.reactor:  # The probes were the only readers: don't leave the reactor behind
+                self.reactor.close()
+                self.reactor = None
+
+        pairs: dict[str, str] = {}
+        for rx_name, data in received.items():
+            for match in probe_pattern.finditer(bytes(data)):
+                tx_name = match.group(1).decode(errors="replace")
+                if tx_name != rx_name:
+                    pairs[tx_name] = rx_name
+        return pairs
+
+    def open_device(self, chosen_device: int, tx_name: str, rx_name: str,
+                    baudrate: int | None = None, timeout: float | None = None) -> None:
+        """Open the TX/RX pair of a device and start receiving on it"""
+        if chosen_device not in self.TX_SLOTS:
+            raise PortException("Invalid device number")
+        self.make_compressor()  # Invalid compression settings fail before any port is opened
+        self.set_ports_params(baudrate=baudrate, timeout=timeout)
+        tx_port = self.create_port(tx_name)
+        try:
+            rx_port = self.create_port(rx_name)
+        except PortException:
+            tx_port.close()
+            raise
+        self.add_port(self.TX_SLOTS[chosen_device], tx_port)
+        self.add_port(self.RX_SLOTS[chosen_device], rx_port)
+        self.start_receiving(chosen_device)
+
+    def run_in_background(self, action, on_done=None) -> threading.Thread:
+        """Run a lifecycle action (open, close, reconfigure) off the caller's thread.
+
+        on_done(error) is called from the background thread, error is None on success.
+        """
+        def lifecycle_thread_body() -> None:
+            error = None
+            try:
+                action()
+            except Exception as e:
+                error = e
+            if on_done:
+                on_done(error)
+
+        thread = threading.Thread(target=lifecycle_thread_body, daemon=True)
+        thread.start()
+        return thread
+
     def set_ports_params(self, baudrate: int | None = None, timeout: float | None = None):
+        """Apply to live ports in place: pyserial reconfigures the open port, receiving goes on"""
         if baudrate:
             self.baudrate = baudrate
-
-            if self.port1_1 and self.port1_1.is_open: self.port1_1.baudrate = baudrate
-            if self.port1_2 and self.port1_2.is_open: self.port1_2.baudrate = baudrate
-            if self.port2_1 and self.port2_1.is_open: self.port2_1.baudrate = baudrate
-            if self.port2_2 and self.port2_2.is_open: self.port2_2.baudrate = baudrate
         if timeout:
             self.timeout = timeout
 
-            if self.port1_1 and self.port1_1.is_open: self.port1_1.timeout = timeout
-            if self.port1_2 and self.port1_2.is_open: self.port1_2.timeout = timeout
-            if self.port2_1 and self.port2_1.is_open: self.port2_1.timeout = timeout
-            if self.port2_2 and self.port2_2.is_open: self.port2_2.timeout = timeout
+        for name, port in self.ports.items():
+            if not port.is_open:
+                continue
+            if baudrate: port.baudrate = baudrate
+            if timeout:
+                receiver = self.receivers.get(name)
+                port.timeout = self.receive_timeout(timeout) if receiver and receiver.thread else timeout
 
     def print_ports_info(self) -> str:
+        names = list(self.SLOT_NAMES.values()) + [name for name in self.ports if name not in self.SLOT_NAMES.values()]
+        rows = "".join(f"        | {name} | {self.ports[name].name if name in self.ports else 'Not set'}\n" for name in names)
         return f"""
-        | port_1_1 | {self.port1_1.name if self.port1_1 else "Not set"}
-        | port_1_2 | {self.port1_2.name if self.port1_2 else "Not set"}
-        | port_2_1 | {self.port2_1.name if self.port2_1 else "Not set"}
-        | port_2_2 | {self.port2_2.name if self.port2_2 else "Not set"}
-        | baudrate | {self.baudrate}
+{rows}        | baudrate | {self.baudrate}
         | timeout | {self.timeout}
         """
 
     def close_active_ports(self) -> None:
-        if self.port1_1: self.port1_1.close()
-        if self.port1_2: self.port1_2.close()
-        if self.port2_1: self.port2_1.close()
-        if self.port2_2: self.port2_2.close()
+        self.end_receiving()
+        self.stop_captures()
+        self.stop_writers()
+        self.reset_tx_state()
+        for port in self.ports.values():
+            port.close()
@@ -0,0 +1,105 @@
+from collections import deque
+import threading
+import time
+
+class Log2Histogram:
+    """Histogram with power-of-two buckets: bucket i counts values in [2**(i-1), 2**i)."""
+    def __init__(self, buckets: int = 40):
+        self.counts: list[int] = [0] * buckets
+
+    def add(self, value: int) -> None:
+        self.counts[min(value.bit_length(), len(self.counts) - 1)] += 1
+
+    def snapshot(self) -> dict[int, int]:
+        """{bucket upper bound (exclusive): count} for non-empty buckets"""
+        return {1 << index: count for index, count in enumerate(self.counts) if count}
+
+
+class RateWindow:
+    """Rolling bytes/s over the last `seconds` whole seconds (one counter per second)."""
+    def __init__(self, seconds: int = 5):
+        self.seconds: int = seconds
+        self.__buckets: deque[list[int]] = deque(maxlen=seconds + 1)  # [second, bytes]
+
+    def add(self, count: int, now: float) -> None:
+        second = int(now)
+        if self.__buckets and self.__buckets[-1][0] == second:
+            self.__buckets[-1][1] += count
+        else:
+            self.__buckets.append([second, count])
+
+    def rate(self, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        first = int(now) - self.seconds
+        # The current second is still filling up, so it is not part of the window
+        total = sum(count for second, count in list(self.__buckets) if first <= second < int(now))
+        return total / self.seconds
+
+
+class PortStats:
+    """Counters for one port, cheap enough to keep on in production.
+
+    RX counters are incremented only by the port's reader (thread or reactor), so they take
+    no lock. TX counters can be written by the caller's thread (send_messages) and by the
+    port's writer thread at the same time, so record_write() holds a lock.
+    snapshot() may be called from any thread.
+    """
+    def __init__(self, name: str):
+        self.name: str = name
+        self.rx_bytes: int = 0
+        self.rx_reads: int = 0
+        self.empty_reads: int = 0  # Reads that timed out with no data
+        self.portions: int = 0
+        self.tx_bytes: int = 0
+        self.tx_writes: int = 0
+        self.ui_queue_bytes: int = 0  # Last UI handoff depth reported by the consumer
+        self.decompress_errors: int = 0
+        self.codec = None  # FrameCodec of the port when framing is on, adds frame counters to snapshot()
+        self.compressor = None  # Compressor/decompressor when compression is on, adds raw/wire bytes and gain
+        self.read_sizes: Log2Histogram = Log2Histogram(24)
+        self.inter_read_us: Log2Histogram = Log2Histogram(40)  # Microseconds between consecutive non-empty reads
+        self.__rx_rate: RateWindow = RateWindow()
+        self.__tx_rate: RateWindow = RateWindow()
+        self.__last_read_at: float | None = None
+        self.__tx_lock = threading.Lock()
+
+    def record_read(self, size: int, now: float) -> None:
+        if not size:
+            self.empty_reads += 1
+            return
+        self.rx_bytes += size
+        self.rx_reads += 1
+        self.read_sizes.add(size)
+        self.__rx_rate.add(size, now)
+        if self.__last_read_at is not None:
+            self.inter_read_us.add(int((now - self.__last_read_at) * 1e6))
+        self.__last_read_at = now
+
+    def record_write(self, size: int, now: float) -> None:
+        with self.__tx_lock:
+            self.tx_bytes += size
+            self.tx_writes += 1
+            self.__tx_rate.add(size, now)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        snapshot = {
+            "name": self.name,
+            "rx_bytes": self.rx_bytes,
+            "rx_reads": self.rx_reads,
+            "empty_reads": self.empty_reads,
+            "portions": self.portions,
+            "tx_bytes": self.tx_bytes,
+            "tx_writes": self.tx_writes,
+            "ui_queue_bytes": self.ui_queue_bytes,
+            "decompress_errors": self.decompress_errors,
+            "rx_bytes_per_second": self.__rx_rate.rate(now),
+            "tx_bytes_per_second": self.__tx_rate.rate(now),
+            "read_size_histogram": self.read_sizes.snapshot(),
+            "inter_read_us_histogram": self.inter_read_us.snapshot(),
+        }
+        if self.codec:
+            snapshot.update(self.codec.counters())
+        if self.compressor:
+            snapshot.update(self.compressor.counters())
+        return snapshot